@@ -0,0 +1,308 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Benchmarks every trilateration solver on the same fixed set of
+                seeded scenarios, to compare them and to catch performance
+                regressions.
+Usage:          python3 benchmark.py [--save results.json]
+                                     [--baseline results.json]
+============================================================================="""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from measurement import measure_ranges
+from monte_carlo import LAYOUTS, RESCUER_POSITIONS
+from trilateration import (SOLVERS, WARM_STARTED, SolverResult, range_residuals,
+                           trilaterate)
+
+
+class Scenario(NamedTuple):
+    """One trilateration problem with a known answer."""
+    name: str
+    anchors: np.ndarray
+    ranges: np.ndarray
+    truth: np.ndarray
+    # Where a tracking solver last saw the tag, a small step from the truth.
+    previous: np.ndarray
+
+
+def build_scenarios(seed: int = 0, noise_levels=(0, 5),
+                    layouts=("merged", "simulation", "square")) -> List[Scenario]:
+    """Returns the fixed set of scenarios every solver is run on. The same seed
+    always produces the same scenarios.
+    """
+    rng = np.random.default_rng(seed)
+    scenarios = []
+
+    for noise in noise_levels:
+        for layout in layouts:
+            anchors = np.array(LAYOUTS[layout], dtype=float)
+            for rescuer in RESCUER_POSITIONS:
+                truth = np.array(rescuer, dtype=float)
+                world = np.vstack([anchors, truth])
+                pairs = [(i, len(anchors)) for i in range(len(anchors))]
+                ranges = measure_ranges(world, noise, rng, pairs)
+                previous = truth + rng.normal(scale=0.5, size=truth.shape)
+
+                name = f"{layout} ({rescuer[0]:g}, {rescuer[1]:g}) {noise}%"
+                scenarios.append(Scenario(name, anchors, ranges, truth, previous))
+
+    return scenarios
+
+
+def brute_force_trilateration(anchors, ranges, bounds=(-100, 100),
+                              step: float = 0.2) -> SolverResult:
+    """The exhaustive grid search of archive/formula_ayden.py, vectorized one
+    row of the grid at a time. The archive's 0.01 step would take minutes over
+    these bounds, so the default step is coarser.
+    """
+    anchors = np.asarray(anchors, dtype=float)
+    ranges = np.asarray(ranges, dtype=float)
+    axis = np.arange(bounds[0], bounds[1] + step / 2, step)
+
+    best_error, best_guess = np.inf, None
+    for x in axis:
+        row = np.column_stack([np.full_like(axis, x), axis])
+        distances = np.linalg.norm(row[:, None, :] - anchors, axis=-1)
+        errors = np.sum((distances - ranges)**2, axis=1)
+        index = np.argmin(errors)
+        if errors[index] < best_error:
+            best_error, best_guess = errors[index], row[index]
+
+    residual = float(np.sqrt(np.mean(range_residuals(best_guess, anchors, ranges)**2)))
+    return SolverResult(best_guess, True, residual, len(axis)**2, "brute_force")
+
+
+def scipy_root_trilateration(anchors, ranges) -> SolverResult:
+    """The scipy.optimize.root approach of archive/formula.py, applied to the
+    range residuals and started from the centroid of the anchors.
+    """
+    from scipy.optimize import root
+
+    anchors = np.asarray(anchors, dtype=float)
+    ranges = np.asarray(ranges, dtype=float)
+    result = root(range_residuals, anchors.mean(axis=0), args=(anchors, ranges),
+                  method="lm")
+    residual = float(np.sqrt(np.mean(range_residuals(result.x, anchors, ranges)**2)))
+
+    return SolverResult(result.x, bool(result.success), residual,
+                        int(result.nfev), "scipy_root")
+
+
+# Extra solvers which only exist for comparison, on top of trilateration.SOLVERS.
+BENCHMARK_SOLVERS = {
+    "brute_force": brute_force_trilateration,
+    "scipy_root": scipy_root_trilateration,
+}
+
+
+def registered_solvers() -> Dict[str, Callable[[Scenario], SolverResult]]:
+    """Returns a callable per solver which solves a scenario."""
+    solvers = {}
+
+    for name in SOLVERS:
+        if name in WARM_STARTED:
+            solvers[name] = lambda scenario, name=name: trilaterate(
+                scenario.anchors, scenario.ranges, method=name,
+                initial_guess=scenario.previous)
+        else:
+            solvers[name] = lambda scenario, name=name: trilaterate(
+                scenario.anchors, scenario.ranges, method=name)
+
+    for name, solver in BENCHMARK_SOLVERS.items():
+        solvers[name] = lambda scenario, solver=solver: solver(scenario.anchors,
+                                                               scenario.ranges)
+
+    return solvers
+
+
+def benchmark_solver(solve: Callable[[Scenario], SolverResult],
+                     scenarios: List[Scenario], repeat: int) -> dict:
+    """Runs one solver on every scenario and summarizes its cost and accuracy.
+    Peak memory is measured on a separate run, as tracing allocations slows
+    the solver down.
+
+    Returns:
+        dict: The median and 95th percentile wall time per solve in seconds,
+            the mean number of function evaluations, the largest peak of
+            traced memory in bytes, the RMS and largest position error, and
+            the fraction of solves which reported failure.
+    """
+    times, evaluations, errors, peaks, failures = [], [], [], [], 0
+
+    for scenario in scenarios:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = solve(scenario)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        solve(scenario)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        evaluations.append(result.nfev)
+        errors.append(np.linalg.norm(result.x - scenario.truth))
+        failures += not result.success
+
+    errors = np.array(errors)
+    return {
+        "median_time": float(np.median(times)),
+        "p95_time": float(np.percentile(times, 95)),
+        "mean_nfev": float(np.mean(evaluations)),
+        "peak_memory": int(max(peaks)),
+        "rms_error": float(np.sqrt(np.mean(errors**2))),
+        "max_error": float(errors.max()),
+        "failure_rate": failures / len(scenarios),
+    }
+
+
+def run(solver_names: List[str] = None, repeat: int = 3, seed: int = 0) -> Dict[str, dict]:
+    """Benchmarks the named solvers (all of them by default)."""
+    solvers = registered_solvers()
+    scenarios = build_scenarios(seed)
+
+    return {name: benchmark_solver(solvers[name], scenarios, repeat)
+            for name in (solver_names or solvers)}
+
+
+def print_table(results: Dict[str, dict]) -> None:
+    print(f"{'solver':<24}{'median':>12}{'p95':>12}{'nfev':>10}{'peak KiB':>10}"
+          f"{'rms err':>10}{'max err':>10}{'failed':>8}")
+    for name, stats in sorted(results.items(), key=lambda item: item[1]["median_time"]):
+        print(f"{name:<24}{stats['median_time'] * 1e6:>10.1f}us"
+              f"{stats['p95_time'] * 1e6:>10.1f}us{stats['mean_nfev']:>10.0f}"
+              f"{stats['peak_memory'] / 1024:>10.1f}{stats['rms_error']:>10.4f}"
+              f"{stats['max_error']:>10.4f}{stats['failure_rate']:>8.0%}")
+
+
+def find_regressions(results: Dict[str, dict], baseline: Dict[str, dict],
+                     tolerance: float) -> List[str]:
+    """Compares results against a saved baseline.
+
+    Args:
+        results (dict): The current results.
+        baseline (dict): The results to compare against.
+        tolerance (float): The allowed relative slowdown of the median time,
+            e.g. 0.25 for 25%.
+
+    Returns:
+        List[str]: A description of every solver which got slower or less
+            accurate.
+    """
+    regressions = []
+
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        if stats["median_time"] > before["median_time"] * (1 + tolerance):
+            regressions.append(f"{name}: median time {before['median_time'] * 1e6:.1f}us"
+                               f" -> {stats['median_time'] * 1e6:.1f}us")
+        if stats["rms_error"] > before["rms_error"] * (1 + tolerance) + 1e-9:
+            regressions.append(f"{name}: rms error {before['rms_error']:.4f}"
+                               f" -> {stats['rms_error']:.4f}")
+
+    return regressions
+
+
+# A one-shot headless solve: import the core, calibrate and place the rescuer.
+COLD_START_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from merged_program import BaseStation
+from devices import ANCHOR, RESCUER, VICTIM, DeviceRegistry
+registry = DeviceRegistry()
+for x, y in [(-20, 20), (18, 15), (0, -19)]:
+    registry.add(ANCHOR, x, y)
+registry.add(VICTIM, 4, 4, name="victim")
+registry.add(RESCUER, 2, 2, name="rescuer")
+station = BaseStation(registry)
+station.calibration()
+station.locate_rescuer((10, -5))
+elapsed = time.perf_counter() - start
+heavy = sorted({name.split(".")[0] for name in sys.modules} & {"matplotlib", "scipy"})
+print(elapsed, ",".join(heavy), file=sys.stderr)
+"""
+
+# What every module used to pay at import time before the headless mode.
+EAGER_IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import numpy
+import matplotlib.pyplot
+import matplotlib.animation
+import scipy.optimize
+print(time.perf_counter() - start, "", file=sys.stderr)
+"""
+
+
+def measure_cold_start(script: str, runs: int = 5) -> Tuple[float, str]:
+    """Runs a script in fresh interpreters and returns its median time, as
+    reported by the script itself on stderr, along with the heavy modules it
+    ended up importing.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    times, heavy = [], ""
+
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-c", script], cwd=directory,
+                                   capture_output=True, text=True, check=True)
+        elapsed, _, heavy = completed.stderr.strip().splitlines()[-1].partition(" ")
+        times.append(float(elapsed))
+
+    return float(np.median(times)), heavy
+
+
+def print_cold_start() -> None:
+    headless, heavy = measure_cold_start(COLD_START_SCRIPT)
+    eager, _ = measure_cold_start(EAGER_IMPORT_SCRIPT)
+
+    print(f"headless import + calibrate + solve: {headless * 1e3:8.1f} ms"
+          f"  (heavy modules loaded: {heavy or 'none'})")
+    print(f"eager numpy/matplotlib/scipy imports: {eager * 1e3:8.1f} ms")
+    print(f"headless cold start is {headless / eager:.0%} of the eager imports alone")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("Purpose:")[1].split("Usage:")[0])
+    parser.add_argument("--solvers", nargs="+", choices=list(registered_solvers()),
+                        help="solvers to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="seeds the scenarios")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file and "
+                        "exit with an error on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative slowdown against the baseline")
+    parser.add_argument("--cold-start", action="store_true",
+                        help="measure the headless cold start instead")
+    args = parser.parse_args()
+
+    if args.cold_start:
+        print_cold_start()
+        sys.exit(0)
+
+    results = run(args.solvers, args.repeat, args.seed)
+    print_table(results)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
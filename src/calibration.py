@@ -0,0 +1,517 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Recovers relative device coordinates from pairwise distances.
+Usage:          from calibration import calibrate
+============================================================================="""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def pairwise_distances(coordinates: np.ndarray) -> np.ndarray:
+    """Returns the Euclidean distance between every pair of points.
+
+    Args:
+        coordinates (np.ndarray): The (..., N, D) coordinates of the points.
+
+    Returns:
+        np.ndarray: The symmetric (..., N, N) distance matrices.
+    """
+    # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b avoids building an (N, N, D) array.
+    squared_norms = np.sum(coordinates**2, axis=-1)
+    squared = squared_norms[..., :, None] + squared_norms[..., None, :] \
+        - 2 * coordinates @ np.swapaxes(coordinates, -1, -2)
+    diagonal = np.arange(coordinates.shape[-2])
+    squared[..., diagonal, diagonal] = 0
+
+    return np.sqrt(np.clip(squared, 0, None))
+
+
+def classical_mds(distances: np.ndarray, dimensions: int = 2) -> np.ndarray:
+    """Recovers coordinates from a distance matrix by classical
+    multidimensional scaling. Double-centering the squared distances gives the
+    Gram matrix of the centred coordinates, whose leading eigenvectors (scaled
+    by the square root of their eigenvalues) are the coordinates themselves.
+
+    The result is exact for noiseless distances and a least-squares fit of the
+    Gram matrix otherwise. It is unique up to a rotation, translation and
+    reflection, see align_to_reference_frame().
+
+    Any leading axes of distances are treated as independent layouts.
+
+    Args:
+        distances (np.ndarray): The symmetric (..., N, N) distance matrices.
+        dimensions (int): The number of coordinates per device.
+
+    Returns:
+        np.ndarray: The (..., N, dimensions) coordinates, centred on the
+            origin.
+    """
+    distances = np.asarray(distances, dtype=float)
+    count = distances.shape[-1]
+
+    centring = np.eye(count) - np.full((count, count), 1 / count)
+    gram = -0.5 * centring @ (distances**2) @ centring
+
+    eigenvalues, eigenvectors = np.linalg.eigh(gram)
+    # eigh sorts ascending, so the largest eigenvalues are at the end.
+    eigenvalues = eigenvalues[..., ::-1][..., :dimensions]
+    eigenvectors = eigenvectors[..., ::-1][..., :dimensions]
+
+    # Noise can push the smaller eigenvalues negative, which has no geometric
+    # meaning, so those axes collapse to zero instead.
+    return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))[..., None, :]
+
+
+def smacof(distances: np.ndarray, initial: np.ndarray,
+           weights: Optional[np.ndarray] = None, max_iterations: int = 100,
+           tolerance: float = 1e-6) -> Tuple[np.ndarray, float]:
+    """Polishes coordinates by stress majorization (SMACOF), which minimizes
+    the weighted raw stress sum w_ij (|x_i - x_j| - d_ij)^2 directly in
+    distance units. Classical MDS fits squared distances instead, so noisy
+    ranges pull its solution away from the stress minimum.
+
+    Any leading axes of distances are treated as independent layouts, which
+    are iterated together until every one of them has converged.
+
+    Args:
+        distances (np.ndarray): The symmetric (..., N, N) distance matrices.
+        initial (np.ndarray): The (..., N, D) starting coordinates.
+        weights (np.ndarray, optional): Symmetric (N, N) confidence in each
+            distance. A weight of zero marks a pair that was not measured.
+        max_iterations (int): The maximum number of Guttman transforms.
+        tolerance (float): The relative stress decrease at which to stop.
+
+    Returns:
+        Tuple[np.ndarray, float]: The (..., N, D) coordinates and their
+            stress (an array of one stress per layout when batched).
+    """
+    distances = np.asarray(distances, dtype=float)
+    coordinates = np.array(initial, dtype=float)
+    count = distances.shape[-1]
+    diagonal = np.arange(count)
+
+    if weights is None:
+        weights = 1 - np.eye(count)
+        # With unit weights the pseudo-inverse of V is simply I / N.
+        v_pinv = None
+    else:
+        weights = np.asarray(weights, dtype=float) * (1 - np.eye(count))
+        v_matrix = -weights
+        v_matrix[..., diagonal, diagonal] = weights.sum(axis=-1)
+        v_pinv = np.linalg.pinv(v_matrix)
+
+    stress = np.inf
+    for _ in range(max_iterations):
+        current = pairwise_distances(coordinates)
+        new_stress = np.sum(weights * (current - distances)**2, axis=(-2, -1)) / 2
+
+        converged = stress - new_stress <= tolerance * np.maximum(new_stress, tolerance)
+        stress = new_stress
+        if np.all(converged):
+            break
+
+        ratios = np.divide(weights * distances, current,
+                           out=np.zeros_like(current), where=current > 0)
+        b_matrix = -ratios
+        b_matrix[..., diagonal, diagonal] = ratios.sum(axis=-1)
+
+        if v_pinv is None:
+            coordinates = b_matrix @ coordinates / count
+        else:
+            coordinates = v_pinv @ b_matrix @ coordinates
+
+    return coordinates, stress if np.ndim(stress) else float(stress)
+
+
+def calibration_residuals(coordinates: np.ndarray, distances: np.ndarray,
+                          weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Returns the weighted range residual sqrt(w_ij) (|x_i - x_j| - d_ij) of
+    every pair i < j. Their sum of squares is the stress SMACOF minimizes.
+
+    Args:
+        coordinates (np.ndarray): The (N, D) coordinates of the devices, or
+            their (N * D,) flattening as least-squares solvers pass them.
+        distances (np.ndarray): The symmetric (N, N) distance matrix.
+        weights (np.ndarray, optional): Symmetric (N, N) confidence in each
+            distance. A weight of zero marks a pair that was not measured.
+
+    Returns:
+        np.ndarray: The (N * (N - 1) / 2,) residuals, in the order of
+            np.triu_indices.
+
+    Example:
+        least_squares(calibration_residuals, initial.ravel(),
+                      jac=lambda x, *args: calibration_jacobian(
+                          x.reshape(initial.shape), sparse=True),
+                      args=(distances,), tr_solver="lsmr")
+    """
+    distances = np.asarray(distances, dtype=float)
+    coordinates = np.asarray(coordinates, dtype=float).reshape(len(distances), -1)
+    first, second = np.triu_indices(len(distances), k=1)
+
+    lengths = np.linalg.norm(coordinates[first] - coordinates[second], axis=1)
+    residuals = lengths - distances[first, second]
+    if weights is not None:
+        residuals *= np.sqrt(np.asarray(weights, dtype=float)[first, second])
+
+    return residuals
+
+
+def calibration_jacobian(coordinates: np.ndarray, weights: Optional[np.ndarray] = None,
+                         sparse: bool = False):
+    """Returns the exact Jacobian of calibration_residuals() with respect to
+    the flattened coordinates. The residual of a pair only depends on its two
+    devices: its derivative is the unit vector from j to i for x_i and its
+    negative for x_j.
+
+    Args:
+        coordinates (np.ndarray): The (N, D) coordinates of the devices.
+        weights (np.ndarray, optional): Symmetric (N, N) confidence in each
+            distance.
+        sparse (bool): Whether to return a scipy.sparse CSR matrix, which
+            only stores the 2D nonzeros of each row. The dense matrix grows
+            as N^3 and is only practical for up to a few hundred devices.
+
+    Returns:
+        The (N * (N - 1) / 2, N * D) Jacobian.
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+    count, dimensions = coordinates.shape
+
+    first, second = np.triu_indices(count, k=1)
+    offsets = coordinates[first] - coordinates[second]
+    lengths = np.maximum(np.linalg.norm(offsets, axis=1), 1e-12)
+    units = offsets / lengths[:, None]
+    if weights is not None:
+        units *= np.sqrt(np.asarray(weights, dtype=float)[first, second])[:, None]
+
+    rows = np.arange(len(first))
+    if sparse:
+        from scipy.sparse import csr_matrix
+
+        axes = np.arange(dimensions)
+        columns = np.concatenate([first[:, None] * dimensions + axes,
+                                  second[:, None] * dimensions + axes], axis=1)
+        return csr_matrix((np.concatenate([units, -units], axis=1).ravel(),
+                           (np.repeat(rows, 2 * dimensions), columns.ravel())),
+                          shape=(len(first), count * dimensions))
+
+    jacobian = np.zeros((len(first), count, dimensions))
+    jacobian[rows, first] = units
+    jacobian[rows, second] = -units
+
+    return jacobian.reshape(len(first), -1)
+
+
+def levenberg_marquardt_refine(distances: np.ndarray, initial: np.ndarray,
+                               weights: Optional[np.ndarray] = None,
+                               max_iterations: int = 50,
+                               tolerance: float = 1e-9) -> Tuple[np.ndarray, float]:
+    """Polishes coordinates by minimizing the same stress as smacof() with
+    Levenberg-Marquardt on calibration_residuals(). From a classical MDS
+    start it converges quadratically in a handful of iterations, where
+    SMACOF's linear convergence can take dozens.
+
+    The normal equations J^T J are assembled from the D x D blocks of
+    calibration_jacobian()'s structure, u u^T for every pair, instead of from
+    the Jacobian itself, whose N^2 rows would dominate for large N. J^T J is
+    singular along rotations and translations of the whole network, which
+    the damping takes care of.
+
+    Args:
+        distances (np.ndarray): The symmetric (N, N) distance matrix.
+        initial (np.ndarray): The (N, D) starting coordinates.
+        weights (np.ndarray, optional): Symmetric (N, N) confidence in each
+            distance. A weight of zero marks a pair that was not measured.
+        max_iterations (int): The maximum number of Levenberg-Marquardt
+            steps.
+        tolerance (float): The relative stress decrease at which to stop.
+
+    Returns:
+        Tuple[np.ndarray, float]: The (N, D) coordinates and their stress.
+    """
+    distances = np.asarray(distances, dtype=float)
+    coordinates = np.array(initial, dtype=float)
+    count, dimensions = coordinates.shape
+    weights = 1 - np.eye(count) if weights is None \
+        else np.asarray(weights, dtype=float) * (1 - np.eye(count))
+    diagonal = np.arange(count)
+
+    def linearize(coordinates):
+        offsets = coordinates[:, None, :] - coordinates[None, :, :]
+        lengths = np.linalg.norm(offsets, axis=-1)
+        lengths[diagonal, diagonal] = 1
+        units = offsets / np.maximum(lengths, 1e-12)[..., None]
+        errors = weights * (lengths - distances)
+
+        # g_i = sum_j w_ij r_ij u_ij, and the (i, j) block of J^T J is
+        # -w_ij u_ij u_ij^T, with the diagonal blocks making rows sum to 0
+        gradient = np.einsum("ij,ijd->id", errors, units).ravel()
+        blocks = -weights[..., None, None] * units[..., :, None] * units[..., None, :]
+        blocks[diagonal, diagonal] = -blocks.sum(axis=1)
+        hessian = blocks.transpose(0, 2, 1, 3).reshape(count * dimensions, -1)
+        stress = np.sum(errors * (lengths - distances)) / 2
+
+        return gradient, hessian, stress
+
+    gradient, hessian, stress = linearize(coordinates)
+    identity = np.eye(count * dimensions)
+    damping = 1e-3 * np.mean(np.diag(hessian))
+
+    for _ in range(max_iterations):
+        step = np.linalg.solve(hessian + damping * identity, -gradient)
+        candidate = coordinates + step.reshape(count, dimensions)
+        candidate_gradient, candidate_hessian, candidate_stress = linearize(candidate)
+
+        if candidate_stress < stress:
+            converged = stress - candidate_stress <= tolerance * max(candidate_stress, tolerance)
+            coordinates, gradient, hessian = candidate, candidate_gradient, candidate_hessian
+            stress = candidate_stress
+            damping /= 10
+            if converged:
+                break
+        else:
+            damping *= 10
+
+    return coordinates, float(stress)
+
+
+def align_to_reference_frame(coordinates: np.ndarray, below=None) -> np.ndarray:
+    """Moves coordinates into the frame BaseStation reports them in: device 0
+    at the origin, device 1 on the positive y-axis and device 2 on the
+    positive-x side (and, in 3D, in the x-y plane).
+
+    In 3D, distances cannot tell the devices apart from their mirror image
+    through the plane of devices 0 to 2. If some devices are known to lie
+    below the rest, as victims buried beneath the anchors do, the image is
+    chosen in which they are lower on average, so that z points up.
+
+    Args:
+        coordinates (np.ndarray): The (N, D) coordinates, N >= D.
+        below (array-like, optional): The indices of the devices known to lie
+            below the others, in 3D.
+
+    Returns:
+        np.ndarray: The (N, D) coordinates in the reference frame.
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+    shifted = coordinates - coordinates[0]
+    dimensions = coordinates.shape[1]
+
+    if len(coordinates) < 2 or not np.any(shifted[1]):
+        return shifted
+
+    # Gram-Schmidt on devices 1 and 2 gives the y and x axes in that order.
+    y_axis = shifted[1] / np.linalg.norm(shifted[1])
+    x_axis = shifted[2] - (shifted[2] @ y_axis) * y_axis if len(shifted) > 2 \
+        else np.zeros(dimensions)
+
+    if np.linalg.norm(x_axis) < 1e-12:
+        # Device 2 is missing or collinear, so any perpendicular will do.
+        x_axis = np.linalg.svd(y_axis[None, :])[2][-1]
+    x_axis /= np.linalg.norm(x_axis)
+
+    axes = [x_axis, y_axis]
+    if dimensions == 3:
+        z_axis = np.cross(x_axis, y_axis)
+        if below is not None and len(below) and len(below) < len(shifted):
+            heights = shifted @ z_axis
+            above = np.ones(len(shifted), dtype=bool)
+            above[below] = False
+            if np.mean(heights[below]) > np.mean(heights[above]):
+                z_axis = -z_axis
+        axes.append(z_axis)
+
+    return shifted @ np.array(axes).T
+
+
+def procrustes_alignment(coordinates: np.ndarray,
+                         reference: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Finds the rotation (or reflection) and translation which best map
+    coordinates onto reference in the least-squares sense. Calibrated
+    coordinates live in an arbitrary frame, so this is how they are compared
+    against ground truth.
+
+    Any leading axes are treated as independent layouts.
+
+    Args:
+        coordinates (np.ndarray): The (..., N, D) coordinates to move.
+        reference (np.ndarray): The (..., N, D) coordinates to move them onto.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (..., D, D) rotation and (..., D)
+            translation, applied as coordinates @ rotation + translation.
+    """
+    coordinates_centre = coordinates.mean(axis=-2, keepdims=True)
+    reference_centre = reference.mean(axis=-2, keepdims=True)
+
+    covariance = np.swapaxes(coordinates - coordinates_centre, -1, -2) \
+        @ (reference - reference_centre)
+    left, _, right = np.linalg.svd(covariance)
+    rotation = left @ right
+    translation = reference_centre - coordinates_centre @ rotation
+
+    return rotation, translation[..., 0, :]
+
+
+# Every method calibrate() can polish with, by name.
+REFINERS = {
+    "smacof": smacof,
+    "levenberg_marquardt": levenberg_marquardt_refine,
+}
+
+
+def calibrate(distances: np.ndarray, dimensions: int = 2,
+              refine: bool = True, below=None,
+              method: str = "smacof") -> np.ndarray:
+    """Recovers the relative coordinates of every device from the distances
+    between them.
+
+    Args:
+        distances (np.ndarray): The symmetric (N, N) distance matrix.
+        dimensions (int): The number of coordinates per device.
+        refine (bool): Whether to polish the classical MDS solution. Only
+            matters when the distances are noisy.
+        below (array-like, optional): The indices of devices known to lie
+            below the rest, which settles the mirror image in 3D. See
+            align_to_reference_frame().
+        method (str): How to polish, one of REFINERS: "smacof", or
+            "levenberg_marquardt" for levenberg_marquardt_refine().
+
+    Raises:
+        ValueError: If method is not a known polishing method.
+
+    Returns:
+        np.ndarray: The (N, dimensions) coordinates in the reference frame of
+            align_to_reference_frame().
+    """
+    if method not in REFINERS:
+        raise ValueError(f"Unknown calibration method '{method}'. "
+                         f"Choose from: {', '.join(REFINERS)}.")
+
+    coordinates = classical_mds(distances, dimensions)
+
+    if refine:
+        coordinates, _ = REFINERS[method](distances, coordinates)
+
+    return align_to_reference_frame(coordinates, below)
+
+
+class IncrementalCalibrator():
+    """Keeps a calibrated network up to date as single pairwise ranges are
+    remeasured. Only the two devices whose range changed are re-solved, by a
+    damped Gauss-Newton fit of their ranges to every other device, starting
+    from their current coordinates. Everyone else stays put, so an update
+    costs O(N) instead of a full O(N^3) calibration.
+    """
+
+    def __init__(self, distances: np.ndarray, coordinates: np.ndarray,
+                 weights: Optional[np.ndarray] = None):
+        """
+        Args:
+            distances (np.ndarray): The symmetric (N, N) distance matrix the
+                coordinates were calibrated from.
+            coordinates (np.ndarray): The (N, D) calibrated coordinates, in
+                the reference frame of align_to_reference_frame().
+            weights (np.ndarray, optional): Symmetric (N, N) confidence in
+                each distance. A weight of zero marks a pair that was not
+                measured.
+        """
+        self.distances = np.array(distances, dtype=float)
+        self.coordinates = np.array(coordinates, dtype=float)
+        count = len(self.coordinates)
+        self.weights = np.ones((count, count)) if weights is None \
+            else np.array(weights, dtype=float)
+        self.weights[np.arange(count), np.arange(count)] = 0
+
+
+    def update(self, first: int, second: int, distance: float,
+               max_iterations: int = 20, tolerance: float = 1e-9) -> np.ndarray:
+        """Replaces the range between two devices and re-solves them.
+
+        Args:
+            first (int): The index of one device.
+            second (int): The index of the other device.
+            distance (float): The newly measured range between them.
+            max_iterations (int): The maximum number of Gauss-Newton steps.
+            tolerance (float): The relative step size at which to stop.
+
+        Returns:
+            np.ndarray: The indices of every device whose coordinates changed.
+                This is every device when one of the devices defining the
+                reference frame moved, as the frame moves with it.
+
+        Raises:
+            ValueError: If both indices are the same device.
+        """
+        if first == second:
+            raise ValueError("A range needs two different devices.")
+
+        self.distances[first, second] = self.distances[second, first] = distance
+        if self.weights[first, second] == 0:
+            self.weights[first, second] = self.weights[second, first] = 1
+
+        free = np.array([first, second])
+        count, dimensions = self.coordinates.shape
+        identity = np.eye(free.size * dimensions)
+        damping = 1e-3
+
+        residuals, jacobian = self._local_residuals(free)
+        cost = residuals @ residuals
+
+        for _ in range(max_iterations):
+            hessian = jacobian.T @ jacobian
+            step = np.linalg.solve(hessian + damping * identity, -jacobian.T @ residuals)
+
+            previous = self.coordinates[free].copy()
+            self.coordinates[free] += step.reshape(free.size, dimensions)
+            candidate_residuals, candidate_jacobian = self._local_residuals(free)
+            candidate_cost = candidate_residuals @ candidate_residuals
+
+            if candidate_cost < cost:
+                residuals, jacobian, cost = candidate_residuals, candidate_jacobian, candidate_cost
+                damping = max(damping / 10, 1e-12)
+                if np.linalg.norm(step) <= tolerance * (1 + np.linalg.norm(previous)):
+                    break
+            else:
+                self.coordinates[free] = previous
+                damping *= 10
+
+        # Devices 0, 1 and 2 define the frame, so moving one moves the frame.
+        if np.any(free < 3):
+            self.coordinates = align_to_reference_frame(self.coordinates)
+            return np.arange(count)
+
+        return free
+
+
+    def _local_residuals(self, free: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the weighted range residuals of every pair involving a free
+        device, and their Jacobian with respect to the free coordinates."""
+        count, dimensions = self.coordinates.shape
+        # Every pair is listed once: the first free device against everyone,
+        # then the second against everyone except the first.
+        others = [np.delete(np.arange(count), free[:position + 1])
+                  for position in range(free.size)]
+        first = np.concatenate([np.full(len(other), device)
+                                for device, other in zip(free, others)])
+        second = np.concatenate(others)
+
+        offsets = self.coordinates[first] - self.coordinates[second]
+        lengths = np.maximum(np.linalg.norm(offsets, axis=1), 1e-12)
+        scale = np.sqrt(self.weights[first, second])
+        residuals = scale * (lengths - self.distances[first, second])
+
+        # d|x_a - x_b|/dx_a is the unit vector from b to a, and its negative
+        # for x_b.
+        units = scale[:, None] * offsets / lengths[:, None]
+        jacobian = np.zeros((len(first), free.size, dimensions))
+        for position, device in enumerate(free):
+            jacobian[first == device, position] += units[first == device]
+            jacobian[second == device, position] -= units[second == device]
+
+        return residuals, jacobian.reshape(len(first), -1)
@@ -0,0 +1,230 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Stores the coordinates of every simulated anchor and tag.
+Usage:          from devices import DeviceRegistry
+============================================================================="""
+
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+
+ANCHOR = "anchor"
+VICTIM = "victim"
+RESCUER = "rescuer"
+
+# The order of this tuple defines the integer code stored for each role.
+ROLES = (ANCHOR, VICTIM, RESCUER)
+
+
+class Device():
+    """Used to simulate anchors and tags. Manages ground truth (gt) coordinates,
+    and calculated (calc) coordinates.
+
+    BaseStation() uses the distances between ground truth coordinates to
+    calculate the calculated coordinates. A Device holds no coordinates of its
+    own: it is a view onto one row of a DeviceRegistry, so solvers can work on
+    the registry's arrays while the rest of the code keeps using the getters
+    and setters below.
+    """
+    __slots__ = ("registry", "id")
+
+    def __init__(self, registry: "DeviceRegistry", device_id: int):
+        self.registry = registry
+        self.id = device_id
+
+
+    @property
+    def name(self) -> str:
+        return self.registry.names[self.id]
+
+
+    @property
+    def role(self) -> str:
+        return ROLES[self.registry.roles[self.id]]
+
+
+    def get_gt_coordinates(self) -> Tuple[float, ...]:
+        """Returns the ground truth coordinates of the device.
+
+        Returns:
+            Tuple[float, ...]: the x and y (and, in 3D, z) coordinates of the
+                device.
+        """
+        return tuple(self.registry.gt[self.id].tolist())
+
+
+    def get_calc_coordinates(self) -> Tuple[float, ...]:
+        """Returns the calculated coordinates of the device.
+
+        Returns:
+            Tuple[float, ...]: the x and y (and, in 3D, z) coordinates of the
+                device.
+        """
+        return tuple(self.registry.calc[self.id].tolist())
+
+
+    def set_gt_coordinates(self, new_x: float, new_y: float,
+                           new_z: float = None) -> None:
+        """Used to set updated ground truth coordinates for the device.
+
+        Args:
+            new_x (float): The x coordinate.
+            new_y (float): The y coordinate.
+            new_z (float, optional): The z coordinate, in a 3D registry. The
+                current z is kept if omitted.
+        """
+        self.registry._set_row(self.registry.gt, self.id, new_x, new_y, new_z)
+
+
+    def set_calc_coordinates(self, new_x: float, new_y: float,
+                             new_z: float = None) -> None:
+        """Used to set updated calculated coordinates for the device.
+
+        Args:
+            new_x (float): The x coordinate.
+            new_y (float): The y coordinate.
+            new_z (float, optional): The z coordinate, in a 3D registry. The
+                current z is kept if omitted.
+        """
+        self.registry._set_row(self.registry.calc, self.id, new_x, new_y, new_z)
+
+
+    def __repr__(self) -> str:
+        return f"Device({self.name!r}, role={self.role!r})"
+
+
+class DeviceRegistry():
+    """Stores the ground truth and calculated coordinates of every device as
+    contiguous arrays, one row per device, alongside each device's role and
+    name. A device's id is its row, and never changes.
+
+    The gt, calc and roles properties are views onto the live rows, so they can
+    be read and written in bulk. They are invalidated when add() has to grow
+    the underlying storage, so fetch them again after adding devices.
+    """
+
+    def __init__(self, dimensions: int = 2, capacity: int = 8):
+        """
+        Args:
+            dimensions (int): The number of coordinates per device, 2 or 3.
+            capacity (int): The number of devices to allocate room for up front.
+        """
+        if dimensions not in (2, 3):
+            raise ValueError(f"Devices have 2 or 3 coordinates, not {dimensions}.")
+
+        self.dimensions = dimensions
+        self.names: List[str] = []
+        self._count = 0
+        self._gt = np.zeros((capacity, dimensions))
+        self._calc = np.zeros((capacity, dimensions))
+        self._roles = np.zeros(capacity, dtype=np.int8)
+        self._ids_by_name = {}
+
+
+    def add(self, role: str, x_coordinate: float, y_coordinate: float,
+            name: str = None, z_coordinate: float = 0.0) -> Device:
+        """Registers a new device. Its calculated coordinates start at its
+        ground truth, as they did for standalone devices.
+
+        Args:
+            role (str): One of ROLES.
+            x_coordinate (float): The ground truth x coordinate.
+            y_coordinate (float): The ground truth y coordinate.
+            name (str, optional): The label to display the device with.
+                Defaults to the role followed by its index within that role.
+            z_coordinate (float): The ground truth z coordinate (elevation),
+                in a 3D registry.
+
+        Returns:
+            Device: A view onto the new device.
+        """
+        if role not in ROLES:
+            raise ValueError(f"Unknown role '{role}'. Choose from: {', '.join(ROLES)}.")
+        if name is None:
+            name = f"{role}{np.count_nonzero(self.mask(role))}"
+        if name in self._ids_by_name:
+            raise ValueError(f"A device named '{name}' is already registered.")
+
+        if self._count == len(self._gt):
+            self._grow()
+
+        device_id = self._count
+        self._set_row(self._gt, device_id, x_coordinate, y_coordinate, z_coordinate)
+        self._calc[device_id] = self._gt[device_id]
+        self._roles[device_id] = ROLES.index(role)
+        self.names.append(name)
+        self._ids_by_name[name] = device_id
+        self._count += 1
+
+        return Device(self, device_id)
+
+
+    def _set_row(self, coordinates: np.ndarray, device_id: int, x: float, y: float,
+                 z: float = None) -> None:
+        """Writes one device's coordinates, leaving z alone when it is None."""
+        if self.dimensions == 2:
+            if z:
+                raise ValueError("A 2D registry has no z coordinate.")
+            coordinates[device_id] = x, y
+        elif z is None:
+            coordinates[device_id, :2] = x, y
+        else:
+            coordinates[device_id] = x, y, z
+
+
+    def _grow(self) -> None:
+        capacity = max(2 * len(self._gt), 1)
+        for attribute in ("_gt", "_calc", "_roles"):
+            old = getattr(self, attribute)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, attribute, new)
+
+
+    @property
+    def gt(self) -> np.ndarray:
+        """The (N, D) ground truth coordinates of every device."""
+        return self._gt[:self._count]
+
+
+    @property
+    def calc(self) -> np.ndarray:
+        """The (N, D) calculated coordinates of every device."""
+        return self._calc[:self._count]
+
+
+    @property
+    def roles(self) -> np.ndarray:
+        """The (N,) role code of every device, an index into ROLES."""
+        return self._roles[:self._count]
+
+
+    def mask(self, role: str) -> np.ndarray:
+        """Returns a boolean mask selecting every device with the given role."""
+        return self.roles == ROLES.index(role)
+
+
+    def ids(self, role: str) -> np.ndarray:
+        """Returns the ids of every device with the given role, in the order
+        they were added."""
+        return np.flatnonzero(self.mask(role))
+
+
+    def devices(self, role: str) -> List[Device]:
+        """Returns a view onto every device with the given role."""
+        return [Device(self, int(device_id)) for device_id in self.ids(role)]
+
+
+    def __getitem__(self, name: str) -> Device:
+        return Device(self, self._ids_by_name[name])
+
+
+    def __len__(self) -> int:
+        return self._count
+
+
+    def __iter__(self) -> Iterator[Device]:
+        return (Device(self, device_id) for device_id in range(self._count))
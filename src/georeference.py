@@ -0,0 +1,282 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Ties the relative calibration frame to the globe, from WGS-84
+                fixes of some of the anchors, and converts whole arrays of
+                positions to latitude and longitude and back.
+Usage:          python3 georeference.py session.log anchors.csv
+                                        [--output fixes.csv]
+============================================================================="""
+
+import argparse
+import sys
+from typing import Tuple
+
+import numpy as np
+
+from calibration import procrustes_alignment
+
+
+# The WGS-84 ellipsoid
+SEMI_MAJOR_AXIS = 6378137.0
+FLATTENING = 1 / 298.257223563
+SEMI_MINOR_AXIS = SEMI_MAJOR_AXIS * (1 - FLATTENING)
+ECCENTRICITY_SQUARED = FLATTENING * (2 - FLATTENING)
+SECOND_ECCENTRICITY_SQUARED = ECCENTRICITY_SQUARED / (1 - ECCENTRICITY_SQUARED)
+
+
+def geodetic_to_ecef(latitude, longitude, height=0.0) -> np.ndarray:
+    """Converts WGS-84 coordinates to Earth-centred, Earth-fixed ones.
+
+    Args:
+        latitude (array-like): The latitudes, in degrees.
+        longitude (array-like): The longitudes, in degrees.
+        height (array-like): The heights above the ellipsoid, in metres.
+
+    Returns:
+        np.ndarray: The (..., 3) ECEF coordinates, in metres.
+    """
+    latitude, longitude = np.radians(latitude), np.radians(longitude)
+    sin_latitude = np.sin(latitude)
+    prime_vertical = SEMI_MAJOR_AXIS / np.sqrt(1 - ECCENTRICITY_SQUARED * sin_latitude**2)
+
+    horizontal = (prime_vertical + height) * np.cos(latitude)
+    return np.stack([horizontal * np.cos(longitude),
+                     horizontal * np.sin(longitude),
+                     (prime_vertical * (1 - ECCENTRICITY_SQUARED) + height) * sin_latitude],
+                    axis=-1)
+
+
+def ecef_to_geodetic(ecef) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Converts Earth-centred, Earth-fixed coordinates to WGS-84 ones, with
+    two iterations of Bowring's method. That is exact to well under a
+    millimetre anywhere near the surface of the Earth.
+
+    Args:
+        ecef (array-like): The (..., 3) ECEF coordinates, in metres.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The latitudes and
+            longitudes, in degrees, and heights above the ellipsoid, in
+            metres.
+    """
+    x, y, z = np.moveaxis(np.asarray(ecef, dtype=float), -1, 0)
+    longitude = np.arctan2(y, x)
+    horizontal = np.hypot(x, y)
+
+    # The parametric latitude, refined from a spherical first guess
+    reduced = np.arctan2(z, (1 - FLATTENING) * horizontal)
+    for _ in range(2):
+        latitude = np.arctan2(
+            z + SECOND_ECCENTRICITY_SQUARED * SEMI_MINOR_AXIS * np.sin(reduced)**3,
+            horizontal - ECCENTRICITY_SQUARED * SEMI_MAJOR_AXIS * np.cos(reduced)**3)
+        reduced = np.arctan2((1 - FLATTENING) * np.sin(latitude), np.cos(latitude))
+
+    sin_latitude = np.sin(latitude)
+    height = horizontal * np.cos(latitude) + z * sin_latitude \
+        - SEMI_MAJOR_AXIS * np.sqrt(1 - ECCENTRICITY_SQUARED * sin_latitude**2)
+
+    return np.degrees(latitude), np.degrees(longitude), height
+
+
+def enu_rotation(latitude: float, longitude: float) -> np.ndarray:
+    """Returns the (3, 3) rotation whose rows are the east, north and up
+    directions at a point, in ECEF coordinates."""
+    latitude, longitude = np.radians(latitude), np.radians(longitude)
+    sin_latitude, cos_latitude = np.sin(latitude), np.cos(latitude)
+    sin_longitude, cos_longitude = np.sin(longitude), np.cos(longitude)
+
+    return np.array([
+        [-sin_longitude, cos_longitude, 0],
+        [-sin_latitude * cos_longitude, -sin_latitude * sin_longitude, cos_latitude],
+        [cos_latitude * cos_longitude, cos_latitude * sin_longitude, sin_latitude],
+    ])
+
+
+def similarity_transform(coordinates: np.ndarray, reference: np.ndarray,
+                         flatness: float = 0.1) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Finds the scale, rotation (or reflection) and translation which best
+    map coordinates onto reference in the least-squares sense.
+
+    Coordinates which are (nearly) flat in 3D, such as anchors on a slope,
+    fit their mirror image through their plane about as well. The image is
+    then chosen in which the coordinates' z axis points up in reference, as
+    the calibration frame's does (see align_to_reference_frame()).
+
+    Args:
+        coordinates (np.ndarray): The (N, D) coordinates to move.
+        reference (np.ndarray): The (N, D) coordinates to move them onto.
+        flatness (float): How small the coordinates' spread along their
+            plane's normal must be, relative to their largest spread, to
+            count as flat.
+
+    Returns:
+        Tuple[float, np.ndarray, np.ndarray]: The scale, (D, D) rotation and
+            (D,) translation, applied as scale * coordinates @ rotation +
+            translation.
+    """
+    rotation, _ = procrustes_alignment(coordinates, reference)
+    centred = coordinates - coordinates.mean(axis=0)
+
+    dimensions = coordinates.shape[1]
+    if dimensions == 3:
+        _, spread, basis = np.linalg.svd(centred)
+        if spread[-1] <= flatness * spread[0] and rotation[2, 2] < 0:
+            # Mirror the result through the plane of the coordinates
+            normal = basis[-1]
+            rotation = (np.eye(3) - 2 * np.outer(normal, normal)) @ rotation
+
+    moved = centred @ rotation
+    scale = np.sum(moved * (reference - reference.mean(axis=0))) / np.sum(centred**2)
+    translation = reference.mean(axis=0) - scale * coordinates.mean(axis=0) @ rotation
+
+    return scale, rotation, translation
+
+
+class Georeference():
+    """The similarity transform from the calibration frame to local east,
+    north, up (ENU) coordinates around the anchors, estimated from WGS-84
+    fixes of some of them.
+
+    A 2D calibration frame is mapped onto the horizontal plane, at the mean
+    height of the fixes. A 3D one is mapped onto ENU as a whole.
+
+    Every conversion takes whole arrays, so converting all the fixes of a
+    session is a handful of array operations however long it ran.
+    """
+
+    def __init__(self, coordinates, latitude, longitude, height=None):
+        """
+        Args:
+            coordinates (array-like): The (N, 2) or (N, 3) calibrated
+                coordinates of the anchors with a fix, N >= 3.
+            latitude (array-like): The (N,) latitudes of the anchors, in
+                degrees.
+            longitude (array-like): The (N,) longitudes of the anchors, in
+                degrees.
+            height (array-like, optional): The (N,) heights of the anchors
+                above the ellipsoid, in metres. Defaults to 0.
+
+        Raises:
+            ValueError: If there are fewer than three fixes, or they are
+                collinear.
+        """
+        coordinates = np.asarray(coordinates, dtype=float)
+        latitude = np.asarray(latitude, dtype=float)
+        longitude = np.asarray(longitude, dtype=float)
+        height = np.zeros_like(latitude) if height is None else np.asarray(height, dtype=float)
+
+        if coordinates.ndim != 2 or coordinates.shape[1] not in (2, 3):
+            raise ValueError("coordinates must be an (N, 2) or (N, 3) array.")
+        if not len(coordinates) == len(latitude) == len(longitude) == len(height):
+            raise ValueError("Every anchor needs exactly one fix.")
+        if len(coordinates) < 3:
+            raise ValueError(f"Need at least 3 fixes, got {len(coordinates)}.")
+        if np.linalg.matrix_rank(coordinates - coordinates.mean(axis=0)) < 2:
+            raise ValueError("The anchors with a fix must not be collinear.")
+
+        self.dimensions = coordinates.shape[1]
+
+        # The ENU origin is the centre of the fixes, so the frame is as flat
+        # as it can be where the devices are.
+        self.origin = ecef_to_geodetic(
+            geodetic_to_ecef(latitude, longitude, height).mean(axis=0))
+        self._origin_ecef = geodetic_to_ecef(*self.origin)
+        self._enu_rotation = enu_rotation(*self.origin[:2])
+
+        enu = self._to_enu(geodetic_to_ecef(latitude, longitude, height))
+        self.height = float(np.mean(enu[:, 2]))
+        self.scale, self.rotation, self.translation = similarity_transform(
+            coordinates, enu[:, :self.dimensions])
+
+        fitted = self._to_enu(geodetic_to_ecef(*self.to_geodetic(coordinates)))
+        self.residual = float(np.sqrt(np.mean(
+            np.sum((fitted - enu)[:, :self.dimensions]**2, axis=1))))
+
+
+    def _to_enu(self, ecef: np.ndarray) -> np.ndarray:
+        return (ecef - self._origin_ecef) @ self._enu_rotation.T
+
+
+    def _from_enu(self, enu: np.ndarray) -> np.ndarray:
+        return enu @ self._enu_rotation + self._origin_ecef
+
+
+    def to_enu(self, coordinates) -> np.ndarray:
+        """Converts calibrated coordinates to (..., 3) east, north, up
+        coordinates in metres around the anchors."""
+        coordinates = np.asarray(coordinates, dtype=float)
+        enu = self.scale * coordinates @ self.rotation + self.translation
+        if self.dimensions == 2:
+            enu = np.concatenate([enu, np.full(enu.shape[:-1] + (1,), self.height)],
+                                 axis=-1)
+        return enu
+
+
+    def from_enu(self, enu) -> np.ndarray:
+        """Converts east, north, up coordinates around the anchors to
+        calibrated ones. In 2D, the height is dropped."""
+        enu = np.asarray(enu, dtype=float)[..., :self.dimensions]
+        return (enu - self.translation) @ self.rotation.T / self.scale
+
+
+    def to_geodetic(self, coordinates) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Converts calibrated coordinates to WGS-84.
+
+        Args:
+            coordinates (array-like): The (..., D) calibrated coordinates.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The latitudes and
+                longitudes, in degrees, and heights above the ellipsoid, in
+                metres.
+        """
+        return ecef_to_geodetic(self._from_enu(self.to_enu(coordinates)))
+
+
+    def from_geodetic(self, latitude, longitude, height=None) -> np.ndarray:
+        """Converts WGS-84 coordinates to calibrated ones.
+
+        Args:
+            latitude (array-like): The latitudes, in degrees.
+            longitude (array-like): The longitudes, in degrees.
+            height (array-like, optional): The heights above the ellipsoid,
+                in metres. Defaults to the mean height of the fixes.
+
+        Returns:
+            np.ndarray: The (..., D) calibrated coordinates.
+        """
+        if height is None:
+            height = self.origin[2] + self.height
+        return self.from_enu(self._to_enu(geodetic_to_ecef(latitude, longitude, height)))
+
+
+if __name__ == "__main__":
+    from recording import read_log
+
+    parser = argparse.ArgumentParser(description=__doc__.split("Purpose:")[1].split("Usage:")[0])
+    parser.add_argument("path", help="the recording to export")
+    parser.add_argument("fixes", help="a CSV of anchor,latitude,longitude[,height] rows, "
+                        "where anchor is the anchor's index in the recording")
+    parser.add_argument("--output", help="the CSV to write (default: standard output)")
+    args = parser.parse_args()
+
+    records = read_log(args.path)
+    if len(records) == 0:
+        parser.exit(message=f"{args.path} has no records.\n")
+
+    fixes = np.atleast_2d(np.loadtxt(args.fixes, delimiter=",", ndmin=2))
+    anchors = fixes[:, 0].astype(int)
+    height = fixes[:, 3] if fixes.shape[1] > 3 else None
+    georeference = Georeference(records[0]["anchors"][anchors], fixes[:, 1], fixes[:, 2],
+                                height)
+    print(f"scale {georeference.scale:.4f} m/unit, rms fit "
+          f"{georeference.residual:.3f} m", file=sys.stderr)
+
+    latitude, longitude, height = georeference.to_geodetic(records["fix"])
+    np.savetxt(args.output or sys.stdout.buffer,
+               np.column_stack([records["timestamp"], records["device"],
+                                latitude, longitude, height]),
+               fmt=["%.3f", "%d", "%.8f", "%.8f", "%.3f"], delimiter=",",
+               header="timestamp,device,latitude,longitude,height", comments="")
@@ -0,0 +1,99 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Computes how likely every point of a fixed grid is to be the
+                rescuer's position, for the heatmap layer of the live view.
+Usage:          from heatmap import LikelihoodField
+============================================================================="""
+
+from typing import Tuple
+
+import numpy as np
+
+
+class LikelihoodField():
+    """The likelihood of a set of ranges at every point of a fixed 2D grid.
+    With 3D anchors the grid lies in the plane z = height.
+
+    The squared range residuals at a grid point p expand to
+
+        sum_k (|p - a_k| - r_k)^2 = sum_k D_k^2 - 2 sum_k r_k D_k + sum_k r_k^2
+
+    where D_k = |p - a_k| only depends on the anchors. The distance fields D_k
+    and their summed squares are cached, so a new set of ranges only costs one
+    matrix product over the grid. The cache is rebuilt only when the geometry
+    version changes, i.e. after a new calibration.
+    """
+
+    def __init__(self, xlim: Tuple[float, float], ylim: Tuple[float, float],
+                 resolution: int = 200, range_sigma: float = 2.0,
+                 height: float = 0.0):
+        """
+        Args:
+            xlim (Tuple[float, float]): The x extent of the grid.
+            ylim (Tuple[float, float]): The y extent of the grid.
+            resolution (int): The number of grid points along each axis.
+            range_sigma (float): The standard deviation of range noise, which
+                sets how quickly the likelihood falls away from a fit.
+            height (float): The z coordinate of the grid, for 3D anchors.
+        """
+        self.extent = (*xlim, *ylim)
+        self.resolution = resolution
+        self.range_sigma = range_sigma
+        self.height = height
+
+        x = np.linspace(*xlim, resolution)
+        y = np.linspace(*ylim, resolution)
+        # Rows run along y, as imshow(origin="lower") expects
+        grid_x, grid_y = np.meshgrid(x, y)
+        self.points = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+
+        self.geometry_version = None
+        self.rebuilds = 0
+        self._distances = None
+        self._squared_sum = None
+
+
+    def _rebuild(self, anchors: np.ndarray, geometry_version: int) -> None:
+        """Caches the distance field of every anchor."""
+        points = self.points
+        if anchors.shape[1] == 3:
+            points = np.column_stack([points, np.full(len(points), self.height)])
+
+        self._distances = np.linalg.norm(points[None, :, :] - anchors[:, None, :],
+                                         axis=-1)
+        self._squared_sum = np.sum(self._distances**2, axis=0)
+        self.geometry_version = geometry_version
+        self.rebuilds += 1
+
+
+    def evaluate(self, anchors, ranges, geometry_version: int) -> np.ndarray:
+        """Returns the likelihood of one or more sets of ranges over the grid.
+
+        Args:
+            anchors (array-like): The (K, 2) or (K, 3) coordinates of the
+                anchors.
+            ranges (array-like): The (K,) ranges, or (M, K) ranges of several
+                tags, in which case the most likely tag wins at each point.
+            geometry_version (int): Identifies the anchor coordinates. The
+                distance fields are only recomputed when it changes.
+
+        Returns:
+            np.ndarray: The (resolution, resolution) likelihood, scaled so its
+                peak is 1.
+        """
+        if geometry_version != self.geometry_version:
+            self._rebuild(np.asarray(anchors, dtype=float), geometry_version)
+
+        ranges = np.atleast_2d(np.asarray(ranges, dtype=float))
+        squared_error = self._squared_sum - 2 * ranges @ self._distances \
+            + np.sum(ranges**2, axis=1, keepdims=True)
+
+        # Measured from the best fit, so the peak is exactly 1 however poorly
+        # the ranges fit and the exponential never underflows everywhere.
+        squared_error = np.min(squared_error, axis=0)
+        likelihood = np.exp(-0.5 * (squared_error - squared_error.min())
+                            / self.range_sigma**2)
+
+        return likelihood.reshape(self.resolution, self.resolution)
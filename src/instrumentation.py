@@ -0,0 +1,240 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Times each stage of the base station (calibration,
+                trilateration, mouse handling and drawing) and counts solver
+                evaluations and dropped frames, for export or a live overlay.
+Usage:          from instrumentation import Profiler, timed
+============================================================================="""
+
+import contextlib
+import csv
+import functools
+import json
+import math
+import threading
+import time
+
+
+class Histogram():
+    """Counts durations into logarithmic buckets, each about 9% wider than the
+    last, from 100 ns to over a minute. Recording is a logarithm and an
+    increment however many durations have been seen, and percentiles are
+    accurate to within a bucket.
+    """
+
+    SMALLEST = 1e-7
+    BUCKETS_PER_DOUBLING = 8
+    BUCKET_COUNT = 240
+
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+    def record(self, seconds: float) -> None:
+        if seconds > self.SMALLEST:
+            bucket = min(int(self.BUCKETS_PER_DOUBLING * math.log2(seconds / self.SMALLEST)),
+                         self.BUCKET_COUNT - 1)
+        else:
+            bucket = 0
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+    def percentile(self, q: float) -> float:
+        """Returns the q-th percentile duration, in seconds, or NaN if nothing
+        has been recorded.
+
+        Args:
+            q (float): The percentile, between 0 and 100.
+        """
+        if self.count == 0:
+            return math.nan
+
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                # The geometric middle of the bucket, capped by the true max
+                middle = self.SMALLEST * 2**((bucket + 0.5) / self.BUCKETS_PER_DOUBLING)
+                return min(middle, self.max)
+
+        return self.max
+
+
+    def summary(self) -> dict:
+        """Returns the count and the total, mean, p50, p99 and max durations,
+        in seconds."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else math.nan,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class _Span():
+    """Times the body of a with statement into one stage of a profiler."""
+
+    __slots__ = ("profiler", "stage", "start")
+
+
+    def __init__(self, profiler: "Profiler", stage: str):
+        self.profiler = profiler
+        self.stage = stage
+
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.record(self.stage, time.perf_counter() - self.start)
+
+
+# Handed out by a disabled profiler. A with statement on it does nothing.
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Profiler():
+    """Collects a latency histogram for every stage and a total for every
+    counter. Stages are timed with the monotonic performance counter.
+
+    Profilers are safe to share between the GUI thread and a SolverWorker. A
+    disabled profiler records nothing, and costs one attribute check per
+    span or count.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled (bool): Whether to record anything.
+        """
+        self.enabled = enabled
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+
+    def span(self, stage: str):
+        """Returns a context manager which times its body into a stage.
+
+        Example:
+            with profiler.span("trilateration"):
+                ...
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Adds a duration, in seconds, to a stage."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.record(seconds)
+
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        """Adds to a counter, such as the solver evaluations or the dropped
+        frames."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+
+
+    def summary(self) -> dict:
+        """Returns a snapshot of every stage, as Histogram.summary() in
+        seconds, and every counter."""
+        with self._lock:
+            return {
+                "stages": {stage: histogram.summary()
+                           for stage, histogram in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+
+    def export(self, path: str) -> None:
+        """Writes the summary to a .json or .csv file, chosen by the path's
+        extension. In CSV, counters are rows with only a count.
+
+        Raises:
+            ValueError: If the extension is neither .json nor .csv.
+        """
+        summary = self.summary()
+
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                # NaN is not valid JSON
+                stages = {stage: {key: None if value != value else value
+                                  for key, value in stats.items()}
+                          for stage, stats in summary["stages"].items()}
+                json.dump({"stages": stages, "counters": summary["counters"]},
+                          file, indent=2)
+        elif path.endswith(".csv"):
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["name", "kind", "count", "total_s", "mean_s",
+                                 "p50_s", "p99_s", "max_s"])
+                for stage, stats in summary["stages"].items():
+                    writer.writerow([stage, "stage", stats["count"], stats["total"],
+                                     stats["mean"], stats["p50"], stats["p99"],
+                                     stats["max"]])
+                for counter, value in summary["counters"].items():
+                    writer.writerow([counter, "counter", value, "", "", "", "", ""])
+        else:
+            raise ValueError(f"Cannot export to '{path}'. Use a .json or .csv path.")
+
+
+    def report(self) -> str:
+        """Returns one line per stage with its p50 and p99 in milliseconds,
+        then one line per counter, for the live overlay."""
+        summary = self.summary()
+        lines = [f"{stage:<20}{stats['p50'] * 1e3:>8.2f}{stats['p99'] * 1e3:>8.2f} ms"
+                 for stage, stats in summary["stages"].items()]
+        lines += [f"{counter:<20}{value:>8}" for counter, value in summary["counters"].items()]
+        if lines:
+            lines.insert(0, f"{'':<20}{'p50':>8}{'p99':>8}")
+        return "\n".join(lines)
+
+
+# Shared by everything constructed without a profiler
+DISABLED = Profiler(enabled=False)
+
+
+def timed(stage: str):
+    """Decorates a method to time every call into a stage of its object's
+    profiler attribute.
+
+    Args:
+        stage (str): The name of the stage.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.profiler.span(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,61 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Simulates noisy range measurements between devices.
+Usage:          from measurement import measure_ranges
+============================================================================="""
+
+import numpy as np
+
+
+def measure_ranges(positions, error_percentage: float = 0,
+                   rng: np.random.Generator = None, pairs=None) -> np.ndarray:
+    """Returns the distances between devices, each with simulated noise up to
+    'error_percentage'% from the actual value. Kept separate from the base
+    station for a more accurate representation of the blindness of the base
+    station to the ground-truth coordinates of the devices.
+
+    Any leading axes of positions are treated as independent layouts, so a
+    sweep over many layouts is measured in one call.
+
+    Args:
+        positions (array-like): The (..., N, D) ground truth coordinates.
+        error_percentage (float): The largest noise, as a percentage of each
+            distance. Noise is uniformly distributed.
+        rng (np.random.Generator, optional): The source of noise. Pass a
+            seeded generator for reproducible measurements.
+        pairs (array-like, optional): An (M, 2) array of device indices to
+            measure. If omitted, every pair is measured.
+
+    Returns:
+        np.ndarray: The symmetric (..., N, N) range matrix with a zero
+            diagonal, or the (..., M) ranges of the requested pairs.
+    """
+    positions = np.asarray(positions, dtype=float)
+    count = positions.shape[-2]
+
+    if pairs is None:
+        first, second = np.triu_indices(count, k=1)
+    else:
+        pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+        first, second = pairs[:, 0], pairs[:, 1]
+
+    offsets = positions[..., first, :] - positions[..., second, :]
+    magnitudes = np.sqrt(np.sum(offsets**2, axis=-1))
+
+    if error_percentage:
+        if rng is None:
+            rng = np.random.default_rng()
+        maximum_noise = magnitudes * (error_percentage / 100)
+        magnitudes += rng.uniform(-maximum_noise, maximum_noise)
+
+    if pairs is not None:
+        return magnitudes
+
+    # Each pair is only measured once, so the matrix stays symmetric.
+    ranges = np.zeros(positions.shape[:-2] + (count, count))
+    ranges[..., first, second] = magnitudes
+    ranges[..., second, first] = magnitudes
+
+    return ranges
@@ -6,166 +6,100 @@ Purpose:        Simulates a novel avalanche-victim localization technology.
 Usage:          python3 simulation.py
 ============================================================================="""
 
-import random
-from math import sqrt
 import time
 from typing import Tuple
-from scipy.optimize import differential_evolution
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
+import numpy as np
+from calibration import IncrementalCalibrator, calibrate
+from devices import ANCHOR, RESCUER, VICTIM, Device, DeviceRegistry
+from heatmap import LikelihoodField
+from instrumentation import DISABLED, timed
+from measurement import measure_ranges
+from tracking import ExtendedKalmanFilter, ParticleFilter
+from trilateration import WARM_STARTED, SolverCache, localize_tags, trilaterate
+from worker import SolverWorker
 
 
-class Device():
-    """Used to simulate anchors and tags. Manages ground truth (gt) coordinates,
-    and calculated (calc) coordinates.
-
-    BaseStation() uses the distances between ground truth coordinates to 
-    calculate the calculated coordinates. 
-    """
-
-    def __init__(self, x_coordinate: float, y_coordinate: float):
-        self.gt_x_coordinate = x_coordinate
-        self.calc_x_coordinate = x_coordinate
-        
-        self.gt_y_coordinate = y_coordinate
-        self.calc_y_coordinate = y_coordinate
-
-
-    def get_gt_coordinates(self) -> Tuple[float, float]:
-        """Returns the ground truth coordinates of the device.
-
-        Returns:
-            Tuple[float, float]: the x and y coordinates of the device.
-        """
-        return self.gt_x_coordinate, self.gt_y_coordinate
-    
-    
-    def get_calc_coordinates(self) -> Tuple[float, float]:
-        """Returns the calculated coordinates of the device.
-
-        Returns:
-            Tuple[float, float]: the x and y coordinates of the device.
-        """
-        return self.calc_x_coordinate, self.calc_y_coordinate
-    
-
-    def set_gt_coordinates(self, new_x: float, new_y: float) -> None:
-        """Used to set updated ground truth coordinates for the device. 
-
-        Args:
-            new_x (float): The x coordinate.
-            new_y (float): The y coordinate.
-        """
-        self.gt_x_coordinate = new_x
-        self.gt_y_coordinate = new_y
-
-
-    def set_calc_coordinates(self, new_x: float, new_y: float) -> None:
-        """Used to set updated calculated coordinates for the device. 
+class BaseStation():
+     
+    def __init__(self, registry: DeviceRegistry,
+                 trilateration_method: str = None,
+                 refine_calibration: bool = True,
+                 error_percentage: float = 0, seed: int = None,
+                 background_solver: bool = True, show_heatmap: bool = False,
+                 cache_size: int = 256, cache_resolution: float = 0.01,
+                 recorder=None, localize_victims: bool = False,
+                 profiler=None):
+        """Constructing a BaseStation does no work. Call calibration() and
+        locate_rescuer() to run it headless, or main() for the live plot.
 
         Args:
-            new_x (float): The x coordinate.
-            new_y (float): The y coordinate.
+            registry (DeviceRegistry): The anchors and tags to localize.
+            trilateration_method (str, optional): The solver used to place
+                the rescuer, see trilateration.SOLVERS. Defaults to "linear"
+                in 2D and "hemisphere" in 3D. "hemisphere" handles 3D anchors
+                which all sit at about the same height by assuming tags are
+                not above them. "tracking" refines the rescuer's previous fix
+                and only escalates to a global search when the residual is
+                too large. "differential_evolution" is the
+                original global search and is only kept as a fallback.
+                "ekf" tracks the rescuer with an extended Kalman filter,
+                which smooths its path at a fixed cost per update.
+                "particle" tracks it with a particle filter, which keeps
+                every position that fits the ranges and draws their modes.
+            refine_calibration (bool): Whether to polish the multidimensional
+                scaling calibration with stress majorization (SMACOF).
+            error_percentage (float): The largest simulated range noise, as a
+                percentage of each range.
+            seed (int, optional): Seeds the range noise, for repeatable runs.
+            background_solver (bool): Whether to locate the rescuer on a
+                worker thread, so the plot stays responsive however slow the
+                solver is.
+            show_heatmap (bool): Whether to shade the live plot by how
+                likely each point is to be the rescuer.
+            cache_size (int): How many solutions to remember, so that
+                repeated ranges are not solved again. 0 disables the cache,
+                which is never used by the warm-started or filter methods.
+            cache_resolution (float): Ranges closer than this share a
+                cached solution.
+            recorder (Recorder, optional): Logs every rescuer measurement
+                and fix, for replaying the session later with recording.py.
+            localize_victims (bool): Whether to calibrate the anchors alone
+                and then localize every victim against them as one batch,
+                see locate_victims(). Suits sites with many victim tags.
+            profiler (Profiler, optional): Times every stage and counts
+                solver evaluations, and adds a live p50/p99 overlay to the
+                plot. Nothing is timed by default.
         """
-        self.calc_x_coordinate = new_x
-        self.calc_y_coordinate = new_y
-
-
-class UserInterface:
-    
-    def __init__(self, fig, ax):
-        self.ax = ax
-        self.fig = fig
-        self.points_to_draw = {}
-        
-
-    def update_data(self, points_dict):
-        # If I do not make a copy, UserInterface will access the same self.points
-        # data structure managed in BaseStation, which isn't bad in this 
-        # configuration but renders this function useless after its first call
-        # and poses challenges down the road.
-        self.points_to_draw = points_dict.copy()
-
-
-    def animate(self, frame):
-        """Animation function called at each frame."""
-        #ADD LINES BETWEEN ALL POINTS AND RESCUER WITH DISTANCES.
-            #Start with just lines
-            #Move to distances after (have to pull from basestation)
-        self.ax.clear()
-        # TODO: Set axis limits (could dynamically calculate from points if needed)
-        self.ax.set_xlim(-40, 40)
-        self.ax.set_ylim(-40, 40)
-        self.ax.grid(True)
-
-        updatedArtists = []
-
-        # place points on grapg
-        for label, (x, y) in self.points_to_draw.items():
-            if x is not None and y is not None:
-                # print(x,y)
-                scatter = self.ax.scatter(x, y, label=label)
-                text = self.ax.text(x + 0.1, y + 0.1, label, fontsize=9)
-                #Append the artists
-                updatedArtists.extend([scatter,text])
-        
-        #place lines between victim/beacon and rescuer point
-        rescuerCoords = self.points_to_draw.get("rescuer", None)
-        if rescuerCoords is not None:
-            rx, ry = rescuerCoords
-            for label, (x,y) in self.points_to_draw.items():
-                if label != "rescuer" and x is not None and y is not None:
-                    #grabs the element from the returned list to use as an artist in animation
-                    if label == 'victim':
-                        line = self.ax.plot([x, rx], [y, ry], color='red', linestyle='--')[0]
-                    else:
-                        line = self.ax.plot([x, rx], [y, ry], color='gray', linestyle='--')[0]
-                    updatedArtists.append(line)
-
-        legend = self.ax.legend(loc="upper right")
-        updatedArtists.append(legend)
-
-        return updatedArtists
-    
-
-    def start_animation(self):
-        self.ani = animation.FuncAnimation(self.fig, self.animate, interval=100, cache_frame_data=False)
-
-        
-def get_distance(device1: Device, device2: Device) -> float:
-    """Returns the distance between two devices, with simulated noise up to 
-    'error_percentage'% from the actual value. Kept separate from the base station
-    class for a more accurate representation of the blindness of the base station
-    to the ground-truth coordinates of the devices.
-
-    Args:
-        device1 (Device): The first device.
-        device2 (Device): The second device.
-
-    Returns:
-        float: The magnitude of distance (in 2d) between devices, with noise.
-    """
-    x = 0
-    y = 1
-    error_percentage = 0
-    
-    device1_coords = device1.get_gt_coordinates()
-    device2_coords = device2.get_gt_coordinates()
-    x_delta = device1_coords[x] - device2_coords[x]
-    y_delta = device1_coords[y] - device2_coords[y]
-    magnitude = sqrt(x_delta**2 + y_delta**2)
-
-    maximum_noise = magnitude * (error_percentage / 100)
-    noisy_magnitude = magnitude + random.uniform(-maximum_noise, maximum_noise)
-    
-    return noisy_magnitude
-
-
-class BaseStation():
-     
-    def __init__(self):
+        self.registry = registry
         self.points = {}
-        self.main()
+        if trilateration_method is None:
+            trilateration_method = "hemisphere" if registry.dimensions == 3 else "linear"
+        self.trilateration_method = trilateration_method
+        self.refine_calibration = refine_calibration
+        self.error_percentage = error_percentage
+        self.rng = np.random.default_rng(seed)
+        self.background_solver = background_solver
+        self.worker = None
+        self.show_heatmap = show_heatmap
+        self.heatmap = None
+        self.heatmap_image = None
+        # Bumped by every calibration, so that anything cached against the
+        # calculated coordinates knows to recompute
+        self.geometry_version = 0
+        self.cache = SolverCache(cache_size, cache_resolution) if cache_size else None
+        self.recorder = recorder
+        self.profiler = profiler or DISABLED
+        self.localize_victims = localize_victims
+        # The RMS range residual of each victim, from locate_victims()
+        self.victim_residuals = {}
+        # Set by calibration(), for recalibrate_pair()
+        self.static_ids = None
+        self.calibrator = None
+        # One filter per rescuer, keyed by device id, for the "ekf" and
+        # "particle" methods
+        self.trackers = {}
+        # The posterior modes of each rescuer, for the "particle" method
+        self.modes = {}
 
 
     def temporary_display_method(self, points: dict):
@@ -175,6 +109,8 @@ class BaseStation():
         Parameters:
             coord_dict (dict): Dictionary with names as keys and (x, y) tuples as values.
         """
+        import matplotlib.pyplot as plt
+
         for name, (x, y) in points.items():
             plt.scatter(x, y, label=name)
             plt.text(x, y, name, fontsize=9, ha='right', va='bottom')
@@ -206,129 +142,289 @@ class BaseStation():
             self.trilateration()
 
 
+    @timed("calibration")
     def calibration(self) -> None:
         """Uses the relative distances between devices to calculate relative
         coordinates for each device.
+
+        Raises:
+            ValueError: If there are too few anchors for the trilateration
+                method, which would otherwise fail on every update.
         """
-        a0x, a0y, a1x = 0, 0, 0
-        
+        # In 3D, "hemisphere" and the filters which start from it get by with
+        # one anchor per dimension. Every other solver needs one more, as
+        # does anything in 2D, where the side of the anchors is unknown.
+        dimensions = self.registry.dimensions
+        needed = dimensions + 1
+        if dimensions == 3 and self.trilateration_method in ("hemisphere", "ekf", "particle"):
+            needed = dimensions
+        if len(self.registry.ids(ANCHOR)) < needed:
+            raise ValueError(f"The '{self.trilateration_method}' method needs at least "
+                             f"{needed} anchors in {dimensions}D, got "
+                             f"{len(self.registry.ids(ANCHOR))}.")
+
+        # Anchors come first, so that anchor0 and anchor1 define the frame
+        static_ids = self.registry.ids(ANCHOR)
+        if not self.localize_victims:
+            static_ids = np.concatenate([static_ids, self.registry.ids(VICTIM)])
+
         # Retrieve the distances between each device
-        a0a1 = get_distance(anchor0, anchor1)
-        a0a2 = get_distance(anchor0, anchor2)
-        a0vt = get_distance(anchor0, victim_tag)
-        a1a2 = get_distance(anchor1, anchor2)
-        a1vt = get_distance(anchor1, victim_tag)
-        a2vt = get_distance(anchor2, victim_tag)
-
-        def calibration_callback(unknowns):
-            a1y, a2x, a2y, vtx, vty = unknowns
-            eq1 = (a1x - a0x)**2 + (a1y - a0y)**2 - a0a1**2 
-            eq2 = (a2x - a0x)**2 + (a2y - a0y)**2 - a0a2**2 
-            eq3 = (vtx - a0x)**2 + (vty - a0y)**2 - a0vt**2  
-            eq4 = (a2x - a1x)**2 + (a2y - a1y)**2 - a1a2**2
-            eq5 = (vtx - a1x)**2 + (vty - a1y)**2 - a1vt**2
-            eq6 = (vtx - a2x)**2 + (vty - a2y)**2 - a2vt**2
-            return eq1**2 + eq2**2 + eq3**2 + eq4**2 + eq5**2 + eq6**2
-
-        # Define bounds for each variable
-        bounds = [(-100, 100)] * 5
-
-        # Perform global optimization using differential evolution
-        result = differential_evolution(calibration_callback, bounds)
+        distances = measure_ranges(self.registry.gt[static_ids],
+                                   self.error_percentage, self.rng)
 
-        # Output result
-        if result.success:
-            a1y, a2x, a2y, vtx, vty = result.x
-            
-            # Update each devices calculated coordinates
-            anchor0.set_calc_coordinates(a0x, a0y)
-            anchor1.set_calc_coordinates(a1x, a1y)
-            anchor2.set_calc_coordinates(a2x, a2y)
-            victim_tag.set_calc_coordinates(vtx, vty)
+        # anchor0 lands on the origin and anchor1 on the y-axis. In 3D, the
+        # victims are buried below the anchors.
+        anchor_count = len(self.registry.ids(ANCHOR))
+        coordinates = calibrate(distances, self.registry.dimensions,
+                                refine=self.refine_calibration,
+                                below=np.arange(anchor_count, len(static_ids)))
 
-            # Update the internal points object
+        # Output result
+        if np.all(np.isfinite(coordinates)):
+            # Update each devices calculated coordinates and the internal
+            # points object
+            self.registry.calc[static_ids] = coordinates
+            self.static_ids = static_ids
+            self.calibrator = IncrementalCalibrator(distances, coordinates)
+            # A new frame invalidates anything tracked in the old one
+            self.trackers = {}
+            self.modes = {}
+            self.geometry_version += 1
             self.points = {
-                "anchor0": (a0x, a0y),
-                "anchor1": (a1x, a1y),
-                "anchor2": (a2x, a2y),
-                "victim": (vtx, vty)
+                self.registry.names[device_id]: tuple(coordinates[i].tolist())
+                for i, device_id in enumerate(static_ids)
             }
             
             print("Solution found:")
 
             for device in self.points:
-                print(f"{device}: \t({self.points[device][0]:.3f}, {self.points[device][1]:.3f})")
+                print(f"{device}: \t({', '.join(f'{value:.3f}' for value in self.points[device])})")
+
+            if self.localize_victims:
+                self.locate_victims()
         else:
             print("No solution found.")
 
+
+    def locate_victims(self) -> dict:
+        """Localizes every victim tag against the calibrated anchors. Victims
+        are independent of each other once the anchors are fixed, so they are
+        all solved as one vectorized batch (sharded across processes for very
+        large counts) instead of joining the calibration.
+
+        Returns:
+            dict: The RMS range residual of each victim, by name.
+        """
+        anchor_ids = self.registry.ids(ANCHOR)
+        victim_ids = self.registry.ids(VICTIM)
+        if len(victim_ids) == 0:
+            return {}
+
+        # Measure every anchor-victim pair at once, one row per victim
+        pairs = np.stack(np.meshgrid(victim_ids, anchor_ids, indexing="ij"), axis=-1)
+        ranges = measure_ranges(self.registry.gt, self.error_percentage,
+                                self.rng, pairs).reshape(len(victim_ids), -1)
+
+        positions, residuals = localize_tags(self.registry.calc[anchor_ids], ranges)
+
+        self.registry.calc[victim_ids] = positions
+        names = [self.registry.names[victim_id] for victim_id in victim_ids]
+        self.points.update(zip(names, map(tuple, positions.tolist())))
+        self.victim_residuals = dict(zip(names, residuals.tolist()))
+
+        print(f"Localized {len(victim_ids)} victims: median residual "
+              f"{np.median(residuals):.3f}, worst {np.max(residuals):.3f}")
+
+        return self.victim_residuals
+
     
+    def recalibrate_pair(self, first: str, second: str,
+                         distance: float = None) -> None:
+        """Takes a new range between two static devices and re-solves only
+        those two, starting from their current calculated coordinates, instead
+        of recalibrating every device.
+
+        Args:
+            first (str): The name of one anchor or victim.
+            second (str): The name of another anchor or victim.
+            distance (float, optional): The new range. By default it is
+                measured from the ground truth, like calibration() does.
+
+        Raises:
+            RuntimeError: If calibration() has not succeeded yet.
+        """
+        if self.calibrator is None:
+            raise RuntimeError("Run calibration() before recalibrating a pair.")
+
+        indices = {self.registry.names[device_id]: index
+                   for index, device_id in enumerate(self.static_ids)}
+        i, j = indices[first], indices[second]
+
+        if distance is None:
+            pair = [(self.static_ids[i], self.static_ids[j])]
+            distance = measure_ranges(self.registry.gt, self.error_percentage,
+                                      self.rng, pair)[0]
+
+        moved = self.calibrator.update(i, j, distance)
+        coordinates = self.calibrator.coordinates[moved]
+        self.registry.calc[self.static_ids[moved]] = coordinates
+        for device_id, coordinate in zip(self.static_ids[moved], coordinates):
+            self.points[self.registry.names[device_id]] = tuple(coordinate.tolist())
+        if len(moved) == len(self.static_ids):
+            # The whole frame was realigned, which invalidates anything
+            # tracked in the old one
+            self.trackers = {}
+            self.modes = {}
+        self.geometry_version += 1
+
+
+    @timed("trilateration")
     def trilateration(self):
         """Develop the trilateration algorithm here
 
-        - uses get_distance to find the difference between the ground truths of
+        - uses measure_ranges to find the difference between the ground truths of
             each point with noise
         - uses a series of equations to calculate the coordinates of the rescuer
         - updates the rescuer's calculated points and adds/updates those 
             points in self.points
         """
-        # self.points["rescuer"] = rescuer_tag.get_gt_coordinates()
-        
-        a0rt = get_distance(anchor0, rescuer_tag) 
-        a1rt = get_distance(anchor1, rescuer_tag) 
-        a2rt = get_distance(anchor2, rescuer_tag) 
-
-        a0x, a0y = anchor0.get_gt_coordinates()
-        a1x, a1y = anchor1.get_gt_coordinates()
-        a2x, a2y = anchor2.get_gt_coordinates()
-
-        def trilateration_callback(unknowns):
-            rtx, rty = unknowns
-            eq1 = (a0x - rtx)**2 + (a0y - rty)**2 - a0rt**2 
-            eq2 = (a1x - rtx)**2 + (a1y - rty)**2 - a1rt**2 
-            eq3 = (a2x - rtx)**2 + (a2y - rty)**2 - a2rt**2  
-            return abs(eq1) + abs(eq2) + abs(eq3)
+        anchor_ids = self.registry.ids(ANCHOR)
+        rescuer_ids = self.registry.ids(RESCUER)
+        anchors = self.registry.gt[anchor_ids]
+
+        # Measure every anchor-rescuer pair at once, one row per rescuer
+        pairs = np.stack(np.meshgrid(rescuer_ids, anchor_ids, indexing="ij"), axis=-1)
+        all_ranges = measure_ranges(self.registry.gt, self.error_percentage,
+                                    self.rng, pairs).reshape(len(rescuer_ids), -1)
+
+        for rescuer_id, ranges in zip(rescuer_ids, all_ranges):
+            rescuer_tag = Device(self.registry, int(rescuer_id))
+
+            # The warm-started solvers are seeded with the rescuer's previous
+            # fix, which is only millimetres away between consecutive mouse
+            # movements.
+            options = {}
+            cached = False
+            if self.trilateration_method in WARM_STARTED:
+                options["initial_guess"] = rescuer_tag.get_calc_coordinates()
+
+            if self.trilateration_method in ("ekf", "particle"):
+                tracker = self.trackers.get(int(rescuer_id))
+                if tracker is None:
+                    tracker = self.trackers[int(rescuer_id)] = self.create_tracker()
+                result = tracker.step(anchors, ranges, time.monotonic())
+            elif self.cache is not None and self.trilateration_method not in WARM_STARTED:
+                hits = self.cache.hits
+                result = self.cache.solve(anchors, ranges, self.geometry_version,
+                                          self.trilateration_method)
+                cached = self.cache.hits > hits
+            else:
+                result = trilaterate(anchors, ranges,
+                                     method=self.trilateration_method, **options)
+
+            if cached:
+                self.profiler.count("cache_hits")
+            else:
+                self.profiler.count("solver_evaluations", result.nfev)
+            if not result.success:
+                self.profiler.count("solver_failures")
+
+            if self.recorder is not None:
+                self.recorder.record(time.time(), rescuer_id, anchors, ranges,
+                                     self.registry.gt[rescuer_id], result.x,
+                                     result.success)
+
+            # Output result
+            if result.success:
+                rescuer_tag.set_calc_coordinates(*result.x)
+
+                # Update the internal points object
+                self.points[rescuer_tag.name] = tuple(result.x.tolist())
+                if self.trilateration_method == "particle":
+                    self.modes[rescuer_tag.name] = tracker.last_modes
+                
+                print("Solution found:")
+
+                for device in self.points:
+                    print(f"{device}: \t({', '.join(f'{value:.3f}' for value in self.points[device])})")
+            else:
+                print("No solution found.")
+
+        if self.heatmap is not None:
+            with self.profiler.span("heatmap"):
+                self.heatmap_image = self.heatmap.evaluate(anchors, all_ranges,
+                                                           self.geometry_version)
+
+
+    def create_tracker(self):
+        """Returns a new filter for the "ekf" or "particle" method."""
+        if self.trilateration_method == "particle":
+            return ParticleFilter(self.registry.dimensions, rng=self.rng)
+
+        return ExtendedKalmanFilter(self.registry.dimensions)
+
+
+    def locate_rescuer(self, position: Tuple[float, float]) -> dict:
+        """Moves the rescuer's ground truth and recalculates its coordinates.
 
-        # Define bounds for each variable
-        bounds = [(-100, 100)] * 2
-
-        # Perform global optimization using differential evolution
-        result = differential_evolution(trilateration_callback, bounds)
+        Args:
+            position (Tuple[float, float]): The rescuer's new ground truth.
 
-        # Output result
-        if result.success:
-            rtx, rty = result.x
+        Returns:
+            dict: A snapshot of the internal points object.
+        """
+        # Update the ground truth of the rescuer tag
+        self.registry.devices(RESCUER)[0].set_gt_coordinates(*position)
 
-            rescuer_tag.set_calc_coordinates(rtx, rty)
+        # Calculate the new coordinates of the rescue tag
+        self.calculate_coordinates(calibration=False, trilateration=True)
 
-            # Update the internal points object
-            self.points["rescuer"] = (rtx, rty)
-            
-            print("Solution found:")
-
-            for device in self.points:
-                print(f"{device}: \t({self.points[device][0]:.3f}, {self.points[device][1]:.3f})")
-        else:
-            print("No solution found.")
+        return self.points.copy()
 
 
+    @timed("mouse_move")
     def mouse_move(self, event):
         # Every time the mouse is moved, it means that the rescuer's ground truth
         # has changed.
         
         if event.xdata is not None and event.ydata is not None:
-            # Update the ground truth of the rescuer tag
-            rescuer_tag.set_gt_coordinates(float(event.xdata), float(event.ydata))
-            
-            # Calculate the new coordinates of the rescue tag
-            self.calculate_coordinates(calibration=False, trilateration=True)
+            position = (float(event.xdata), float(event.ydata))
+
+            if self.worker is not None:
+                # The worker only solves the newest position and publishes the
+                # result to the user interface itself.
+                self.worker.submit(position)
+                return
+
+            self.locate_rescuer(position)
+
+        self.publish(self.points)
 
-        self.visual_obj.update_data(self.points)
+
+    def publish(self, points: dict) -> None:
+        """Hands a snapshot of the points, and any posterior modes, to the
+        user interface."""
+        self.visual_obj.update_data(points)
+        if self.modes:
+            self.visual_obj.update_modes(self.modes)
+        if self.heatmap_image is not None:
+            self.visual_obj.update_heatmap(self.heatmap_image)
 
 
     def main(self):
+        """Builds the plot and blocks until it is closed. The plotting modules
+        are only imported here, so the rest of BaseStation can run headless.
+        """
+        import matplotlib.pyplot as plt
+        from user_interface import UserInterface
+
         # Establish the plot objects
         fig, ax = plt.subplots()
-        self.visual_obj = UserInterface(fig, ax)
+        self.visual_obj = UserInterface(fig, ax, self.registry,
+                                        show_heatmap=self.show_heatmap,
+                                        profiler=self.profiler)
+        if self.show_heatmap:
+            self.heatmap = LikelihoodField(ax.get_xlim(), ax.get_ylim())
 
         # Determine where each static device is (the anchors and victim)
         self.calculate_coordinates(calibration=True, trilateration=False)
@@ -336,6 +432,15 @@ class BaseStation():
         self.visual_obj.update_data(self.points)
         self.visual_obj.start_animation()
 
+        if self.background_solver:
+            self.worker = SolverWorker(self.locate_rescuer, self.publish)
+            self.worker.start()
+            fig.canvas.mpl_connect('close_event', lambda event: self.worker.stop())
+
+        if self.recorder is not None:
+            # Connected after the worker, so the worker has stopped first
+            fig.canvas.mpl_connect('close_event', lambda event: self.recorder.close())
+
         # Run the main program:
         fig.canvas.mpl_connect('motion_notify_event', self.mouse_move)
 
@@ -346,14 +451,16 @@ class BaseStation():
 
 if __name__=="__main__":
     # Establish the initial ground truth coordinates for each device (5 total)
-    anchor0 = Device(-20,20)
-    anchor1 = Device(18, 15)
-    anchor2 = Device(0,-19)
-    victim_tag = Device(4,4)
-    rescuer_tag = Device(2,2)
+    registry = DeviceRegistry()
+    registry.add(ANCHOR, -20, 20, name="anchor0")
+    registry.add(ANCHOR, 18, 15, name="anchor1")
+    registry.add(ANCHOR, 0, -19, name="anchor2")
+    registry.add(VICTIM, 4, 4, name="victim")
+    registry.add(RESCUER, 2, 2, name="rescuer")
 
     # Run the main program
-    obj = BaseStation()
+    obj = BaseStation(registry)
+    obj.main()
 
 
 # TODO:
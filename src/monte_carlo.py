@@ -0,0 +1,224 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Measures localization accuracy headlessly, by running many
+                simulated calibration and trilateration trials over a grid of
+                noise levels, anchor layouts and rescuer positions.
+Usage:          python3 monte_carlo.py --trials 10000 --workers 8
+============================================================================="""
+
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+from calibration import classical_mds, procrustes_alignment, smacof
+from measurement import measure_ranges
+from trilateration import trilaterate_batch
+
+
+# Anchor layouts to sweep over. "merged" is the layout of merged_program.py and
+# "simulation" the layout of simulation.py.
+LAYOUTS = {
+    "merged": [(-20, 20), (18, 15), (0, -19)],
+    "simulation": [(-5, 4), (3, 2), (6, -10)],
+    "square": [(-20, -20), (-20, 20), (20, 20), (20, -20)],
+    "line_and_point": [(-30, 0), (0, 0), (30, 0), (0, 30)],
+}
+
+VICTIM_POSITION = (4, 4)
+RESCUER_POSITIONS = [(2, 2), (10, -5), (-25, 25), (35, 35)]
+NOISE_LEVELS = [0, 1, 2, 5, 10]
+
+
+class Cell(NamedTuple):
+    """One combination of the swept parameters."""
+    error_percentage: float
+    layout: str
+    rescuer: Tuple[float, float]
+
+
+class CellReport(NamedTuple):
+    """The accuracy of every trial run for one cell. Errors are distances
+    between the calculated and ground truth rescuer positions, after the
+    calibrated frame has been aligned onto the ground truth."""
+    cell: Cell
+    trials: int
+    rmse: float
+    p50: float
+    p90: float
+    p99: float
+    victim_rmse: float
+    failure_rate: float
+
+
+def run_trials(anchors: np.ndarray, victim: np.ndarray, rescuer: np.ndarray,
+               error_percentage: float, trials: int, rng: np.random.Generator,
+               refine: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Simulates the full pipeline for many independent trials of one layout:
+    measuring ranges between the static devices, calibrating, measuring the
+    rescuer's ranges and trilaterating it. Every step is batched over trials.
+
+    Args:
+        anchors (np.ndarray): The (K, D) ground truth anchor coordinates.
+        victim (np.ndarray): The (D,) ground truth victim coordinates.
+        rescuer (np.ndarray): The (D,) ground truth rescuer coordinates.
+        error_percentage (float): The largest range noise, as a percentage.
+        trials (int): The number of trials to run.
+        rng (np.random.Generator): The source of range noise.
+        refine (bool): Whether to polish calibration with SMACOF, as
+            BaseStation does by default.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (trials,) rescuer and victim errors.
+    """
+    static = np.vstack([anchors, victim])
+    anchor_count = len(anchors)
+
+    distances = measure_ranges(np.broadcast_to(static, (trials,) + static.shape),
+                               error_percentage, rng)
+    calculated = classical_mds(distances, static.shape[1])
+    if refine:
+        calculated, _ = smacof(distances, calculated)
+
+    # Only the anchors are used to align the frames, as the base station has no
+    # other way of tying its frame to the world.
+    rotation, translation = procrustes_alignment(calculated[:, :anchor_count],
+                                                 anchors)
+    calculated = calculated @ rotation + translation[:, None, :]
+
+    world = np.vstack([anchors, rescuer])
+    pairs = [(i, anchor_count) for i in range(anchor_count)]
+    ranges = measure_ranges(np.broadcast_to(world, (trials,) + world.shape),
+                            error_percentage, rng, pairs)
+    fixes = trilaterate_batch(calculated[:, :anchor_count], ranges)
+
+    rescuer_errors = np.linalg.norm(fixes - rescuer, axis=-1)
+    victim_errors = np.linalg.norm(calculated[:, anchor_count] - victim, axis=-1)
+
+    return rescuer_errors, victim_errors
+
+
+def evaluate_cell(cell: Cell, trials: int, seed: np.random.SeedSequence,
+                  failure_distance: float, refine: bool,
+                  chunk_size: int = 10000) -> CellReport:
+    """Runs every trial for one cell and summarizes the errors. Trials run in
+    chunks to bound memory use.
+    """
+    rng = np.random.default_rng(seed)
+    anchors = np.array(LAYOUTS[cell.layout], dtype=float)
+    victim = np.array(VICTIM_POSITION, dtype=float)
+    rescuer = np.array(cell.rescuer, dtype=float)
+
+    rescuer_errors, victim_errors = [], []
+    for start in range(0, trials, chunk_size):
+        errors = run_trials(anchors, victim, rescuer, cell.error_percentage,
+                            min(chunk_size, trials - start), rng, refine)
+        rescuer_errors.append(errors[0])
+        victim_errors.append(errors[1])
+
+    rescuer_errors = np.concatenate(rescuer_errors)
+    victim_errors = np.concatenate(victim_errors)
+
+    failed = ~np.isfinite(rescuer_errors) | (rescuer_errors > failure_distance)
+    finite = rescuer_errors[np.isfinite(rescuer_errors)]
+    p50, p90, p99 = np.percentile(finite, [50, 90, 99]) if len(finite) else (np.nan,) * 3
+
+    return CellReport(cell, trials, float(np.sqrt(np.mean(finite**2))),
+                      float(p50), float(p90), float(p99),
+                      float(np.sqrt(np.nanmean(victim_errors**2))),
+                      float(np.mean(failed)))
+
+
+def sweep(trials: int = 1000, noise_levels=NOISE_LEVELS, layouts=LAYOUTS,
+          rescuer_positions=RESCUER_POSITIONS, failure_distance: float = 5.0,
+          refine: bool = True, workers: int = None, seed: int = 0) -> List[CellReport]:
+    """Evaluates every combination of noise level, layout and rescuer position,
+    spreading the cells across a process pool.
+
+    Args:
+        trials (int): The number of trials per cell.
+        noise_levels (list): The error percentages to sweep over.
+        layouts (iterable): The names of the LAYOUTS to sweep over.
+        rescuer_positions (list): The rescuer ground truths to sweep over.
+        failure_distance (float): The error beyond which a trial has failed.
+        refine (bool): Whether calibration is polished with SMACOF.
+        workers (int, optional): The number of processes. Defaults to one per
+            core, and 1 runs everything in this process.
+        seed (int): Seeds every cell, so a sweep is reproducible regardless of
+            how cells are scheduled.
+
+    Returns:
+        List[CellReport]: One report per cell, in sweep order.
+    """
+    cells = [Cell(noise, layout, tuple(rescuer)) for noise, layout, rescuer
+             in itertools.product(noise_levels, layouts, rescuer_positions)]
+    seeds = np.random.SeedSequence(seed).spawn(len(cells))
+    arguments = [(cell, trials, cell_seed, failure_distance, refine)
+                 for cell, cell_seed in zip(cells, seeds)]
+
+    if workers == 1:
+        return [evaluate_cell(*argument) for argument in arguments]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(evaluate_cell, *zip(*arguments)))
+
+
+def print_reports(reports: List[CellReport]) -> None:
+    print(f"{'noise %':>7}  {'layout':<15}{'rescuer':<14}{'rmse':>8}{'p50':>8}"
+          f"{'p90':>8}{'p99':>8}{'victim':>8}{'failed':>8}")
+    for report in reports:
+        cell = report.cell
+        rescuer = f"({cell.rescuer[0]:g}, {cell.rescuer[1]:g})"
+        print(f"{cell.error_percentage:>7g}  {cell.layout:<15}{rescuer:<14}"
+              f"{report.rmse:>8.3f}{report.p50:>8.3f}{report.p90:>8.3f}"
+              f"{report.p99:>8.3f}{report.victim_rmse:>8.3f}"
+              f"{report.failure_rate:>8.2%}")
+
+
+def write_csv(reports: List[CellReport], path: str) -> None:
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["error_percentage", "layout", "rescuer_x", "rescuer_y",
+                         "trials", "rmse", "p50", "p90", "p99", "victim_rmse",
+                         "failure_rate"])
+        for report in reports:
+            cell = report.cell
+            writer.writerow([cell.error_percentage, cell.layout, *cell.rescuer,
+                             *report[1:]])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("Purpose:")[1].split("Usage:")[0])
+    parser.add_argument("--trials", type=int, default=1000, help="trials per cell")
+    parser.add_argument("--noise", type=float, nargs="+", default=NOISE_LEVELS,
+                        help="error percentages to sweep over")
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS),
+                        choices=list(LAYOUTS), help="anchor layouts to sweep over")
+    parser.add_argument("--failure-distance", type=float, default=5.0,
+                        help="error beyond which a trial counts as failed")
+    parser.add_argument("--no-refine", action="store_true",
+                        help="skip the SMACOF polish of calibration")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processes to spread cells across")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="also write the reports to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    reports = sweep(args.trials, args.noise, args.layouts,
+                    failure_distance=args.failure_distance,
+                    refine=not args.no_refine, workers=args.workers, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    print_reports(reports)
+    print(f"\n{len(reports)} cells x {args.trials} trials in {elapsed:.2f} s")
+
+    if args.csv:
+        write_csv(reports, args.csv)
@@ -0,0 +1,272 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Records every rescuer measurement and fix of a session to a
+                compact binary log, and replays logs back through the solvers
+                faster than real time.
+Usage:          python3 recording.py session.log [--method ransac]
+                                                 [--speed 10]
+============================================================================="""
+
+import argparse
+import time
+from typing import Callable, Tuple
+
+import numpy as np
+
+from tracking import ExtendedKalmanFilter, ParticleFilter
+from trilateration import SOLVERS, WARM_STARTED, SolverResult, trilaterate
+
+
+MAGIC = b"SNOWLOG\0"
+VERSION = 1
+
+# The fixed-size header at the start of every log. The rest of the file is
+# records, which only need the anchor count and dimensions to be decoded.
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"),
+                         ("anchor_count", "<u4"), ("dimensions", "<u4"),
+                         ("reserved", "<u4", 9)])
+
+# Methods which track a tag over time rather than solving each fix alone.
+TRACKERS = {"ekf": ExtendedKalmanFilter, "particle": ParticleFilter}
+
+
+def record_dtype(anchor_count: int, dimensions: int) -> np.dtype:
+    """Returns the dtype of one record: one set of ranges from one tag, with
+    the anchors they were measured against, the tag's ground truth and the
+    fix computed from them."""
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("device", "<i4"),
+        ("success", "u1"),
+        ("padding", "u1", 3),
+        ("anchors", "<f8", (anchor_count, dimensions)),
+        ("ranges", "<f8", (anchor_count,)),
+        ("ground_truth", "<f8", (dimensions,)),
+        ("fix", "<f8", (dimensions,)),
+    ])
+
+
+class Recorder():
+    """Appends records to a binary log. Records are buffered in a
+    preallocated array and written in blocks, so recording adds no more than
+    a few array assignments to each solve. The header is written as soon as
+    the number of anchors is known, from the arguments or the first record.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 256,
+                 anchor_count: int = None, dimensions: int = None):
+        """
+        Args:
+            path (str): The log to create, replacing any existing file.
+            buffer_size (int): The number of records to write at a time.
+            anchor_count (int, optional): The number of anchors per record.
+                Given with dimensions, the header is written straight away,
+                so a session without a single record still leaves a log.
+            dimensions (int, optional): The number of coordinates per anchor.
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._file = open(path, "wb")
+        self._buffer = None
+        self._pending = 0
+        if anchor_count is not None and dimensions is not None:
+            self._start(anchor_count, dimensions)
+
+
+    def _start(self, anchor_count: int, dimensions: int) -> None:
+        """Writes the header and allocates the buffer."""
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["anchor_count"] = anchor_count
+        header["dimensions"] = dimensions
+        self._file.write(header.tobytes())
+        self._buffer = np.zeros(self.buffer_size,
+                                dtype=record_dtype(anchor_count, dimensions))
+
+
+    def record(self, timestamp: float, device: int, anchors, ranges,
+               ground_truth, fix, success: bool) -> None:
+        """Appends one record.
+
+        Args:
+            timestamp (float): When the ranges were measured, in seconds.
+            device (int): The registry id of the tag.
+            anchors (array-like): The (K, D) anchor coordinates solved against.
+            ranges (array-like): The (K,) measured ranges.
+            ground_truth (array-like): The (D,) true position of the tag.
+            fix (array-like): The (D,) computed position of the tag.
+            success (bool): Whether the solver succeeded.
+        """
+        if self._buffer is None:
+            self._start(*np.shape(anchors))
+
+        entry = self._buffer[self._pending]
+        entry["timestamp"] = timestamp
+        entry["device"] = device
+        entry["success"] = success
+        entry["anchors"] = anchors
+        entry["ranges"] = ranges
+        entry["ground_truth"] = ground_truth
+        entry["fix"] = fix
+        self._pending += 1
+        self.count += 1
+
+        if self._pending == self.buffer_size:
+            self.flush()
+
+
+    def flush(self) -> None:
+        """Writes every buffered record to disk."""
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self._pending = 0
+        self._file.flush()
+
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_log(path: str) -> np.ndarray:
+    """Memory-maps the records of a log, without reading them into memory.
+    An empty file, left by a Recorder which never got a record, has no
+    records.
+
+    Raises:
+        ValueError: If the file is not a log of a supported version.
+
+    Returns:
+        np.ndarray: The records, with the dtype of record_dtype().
+    """
+    if _file_size(path) == 0:
+        return np.zeros(0, dtype=record_dtype(0, 0))
+
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC.rstrip(b"\0"):
+        raise ValueError(f"{path} is not a recording.")
+    if header["version"][0] != VERSION:
+        raise ValueError(f"{path} is version {header['version'][0]}, "
+                         f"expected {VERSION}.")
+
+    dtype = record_dtype(int(header["anchor_count"][0]), int(header["dimensions"][0]))
+    if _file_size(path) == HEADER_DTYPE.itemsize:
+        return np.zeros(0, dtype=dtype)
+
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_DTYPE.itemsize)
+
+
+def _file_size(path: str) -> int:
+    with open(path, "rb") as file:
+        return file.seek(0, 2)
+
+
+def replay(records: np.ndarray, method: str = "linear", speed: float = None,
+           on_fix: Callable[[np.ndarray, SolverResult], None] = None) -> np.ndarray:
+    """Feeds recorded ranges back through a solver, in the order they were
+    measured.
+
+    Args:
+        records (np.ndarray): Records from read_log().
+        method (str): A solver in SOLVERS, or one of TRACKERS.
+        speed (float, optional): How many times faster than real time to
+            replay, by waiting between records. By default records are
+            replayed as fast as the solver allows.
+        on_fix (Callable, optional): Called with each record and its result.
+
+    Returns:
+        np.ndarray: The (N, D) fixes, NaN where the solver failed.
+    """
+    if method not in SOLVERS and method not in TRACKERS:
+        raise ValueError(f"Unknown trilateration method '{method}'. "
+                         f"Choose from: {', '.join([*SOLVERS, *TRACKERS])}.")
+
+    fixes = np.full(records["fix"].shape, np.nan)
+    trackers, previous = {}, {}
+    start = time.monotonic()
+
+    for index, record in enumerate(records):
+        if speed and index:
+            delay = (record["timestamp"] - records[0]["timestamp"]) / speed \
+                - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+
+        device = int(record["device"])
+        if method in TRACKERS:
+            if device not in trackers:
+                trackers[device] = TRACKERS[method](record["fix"].size)
+            tracker = trackers[device]
+            result = tracker.step(record["anchors"], record["ranges"], record["timestamp"])
+        else:
+            options = {}
+            if method in WARM_STARTED:
+                options["initial_guess"] = previous.get(device, record["anchors"].mean(axis=0))
+            result = trilaterate(record["anchors"], record["ranges"], method=method,
+                                 **options)
+
+        if result.success:
+            fixes[index] = previous[device] = result.x
+        if on_fix is not None:
+            on_fix(record, result)
+
+    return fixes
+
+
+def summarize(records: np.ndarray, fixes: np.ndarray,
+              elapsed: float) -> Tuple[float, float, float, float]:
+    """Summarizes a replay.
+
+    The ground truth is in world coordinates, so the error against it only
+    means something when the anchors were too (as in merged_program.py, but
+    not groundTruthOverlay.py, which solves in the calibrated frame).
+
+    Returns:
+        Tuple[float, float, float, float]: The RMS distance of the fixes
+            from the recorded ground truth and from the recorded fixes, the
+            fixes per second, and how many times faster than the recorded
+            session the replay ran.
+    """
+    truth_errors = np.linalg.norm(fixes - records["ground_truth"], axis=1)
+    changes = np.linalg.norm(fixes - records["fix"], axis=1)
+    duration = records["timestamp"][-1] - records["timestamp"][0]
+
+    return (float(np.sqrt(np.nanmean(truth_errors**2))),
+            float(np.sqrt(np.nanmean(changes**2))), len(records) / elapsed,
+            duration / elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("Purpose:")[1].split("Usage:")[0])
+    parser.add_argument("path", help="the log to replay")
+    parser.add_argument("--method", default="linear", choices=[*SOLVERS, *TRACKERS])
+    parser.add_argument("--speed", type=float,
+                        help="times faster than real time (default: as fast as possible)")
+    args = parser.parse_args()
+
+    records = read_log(args.path)
+    if len(records) == 0:
+        parser.exit(message=f"{args.path} has no records.\n")
+
+    start = time.perf_counter()
+    fixes = replay(records, args.method, args.speed)
+    elapsed = time.perf_counter() - start
+
+    truth_rmse, recorded_rmse, rate, speedup = summarize(records, fixes, elapsed)
+    print(f"{len(records)} records with {args.method} in {elapsed:.3f} s: "
+          f"{rate:.0f} fixes/s, {speedup:.1f}x real time")
+    print(f"rms distance from ground truth {truth_rmse:.4f}, "
+          f"from the recorded fixes {recorded_rmse:.4f}")
@@ -0,0 +1,327 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Streams range readings from the ultrasonic sensor firmware
+                (ultrasonic_sensor_demo.ino) into the trilateration step.
+Usage:          python3 serial_ingest.py /dev/ttyUSB0 /dev/ttyUSB1 /dev/ttyUSB2
+                    --anchor=-20,20 --anchor=18,15 --anchor=0,-19
+============================================================================="""
+
+import argparse
+import asyncio
+import errno
+import os
+import stat
+import time
+from typing import Callable, Sequence, Tuple
+
+import numpy as np
+
+from trilateration import trilaterate_batch
+
+
+# One timestamped range from one anchor's sensor.
+READING_DTYPE = np.dtype([("anchor", np.int32), ("timestamp", np.float64),
+                          ("range", np.float64)])
+
+# Maps every byte which cannot be part of a number to a space, so that a whole
+# chunk of "Distance: <cm>" lines collapses into space-separated numbers.
+_NUMERIC = bytes(byte if byte in b"0123456789.-" else ord(" ") for byte in range(256))
+
+
+class ReadingBatch():
+    """A growable, preallocated array of readings which the streams append to
+    and the trilateration step periodically drains."""
+
+    def __init__(self, capacity: int = 256):
+        self._readings = np.zeros(capacity, dtype=READING_DTYPE)
+        self._count = 0
+
+
+    def extend(self, anchor: int, timestamp, ranges: np.ndarray) -> None:
+        """Appends readings from one anchor, stamped with either one shared
+        timestamp or an array of one timestamp per reading."""
+        end = self._count + len(ranges)
+        if end > len(self._readings):
+            grown = np.zeros(max(end, 2 * len(self._readings)), dtype=READING_DTYPE)
+            grown[:self._count] = self._readings[:self._count]
+            self._readings = grown
+
+        readings = self._readings[self._count:end]
+        readings["anchor"] = anchor
+        readings["timestamp"] = timestamp
+        readings["range"] = ranges
+        self._count = end
+
+
+    def drain(self) -> np.ndarray:
+        """Returns every reading appended since the last drain."""
+        readings = self._readings[:self._count].copy()
+        self._count = 0
+        return readings
+
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class LineParser():
+    """Parses the "Distance: <cm>" lines printed by one sensor. Each chunk read
+    from the stream is parsed in one go rather than line by line: the complete
+    lines are translated to bare numbers and handed to numpy's C parser, so
+    the cost per chunk does not grow with Python work per line.
+    """
+
+    def __init__(self, anchor: int, scale: float = 1.0):
+        """
+        Args:
+            anchor (int): The index of the anchor the sensor is mounted on.
+            scale (float): Converts the firmware's centimetres to the units
+                of the anchor coordinates.
+        """
+        self.anchor = anchor
+        self.scale = scale
+        self.malformed = 0
+        self._buffer = bytearray()
+        # Whether the stream is known to start at a line boundary. Otherwise
+        # the first line may have been cut off part way through, and is dropped.
+        self.synchronized = False
+        # If set, readings are stamped as if a line arrived every line_period
+        # seconds from the first chunk, instead of when their chunk arrived.
+        self.line_period = None
+        self._origin = None
+        self._lines = 0
+
+
+    def feed(self, chunk: bytes, timestamp: float, batch: ReadingBatch) -> int:
+        """Parses every complete line received so far into the batch. A partial
+        trailing line is kept until the rest of it arrives.
+
+        Args:
+            chunk (bytes): The bytes just read from the stream.
+            timestamp (float): When the chunk arrived.
+            batch (ReadingBatch): Where to append the readings.
+
+        Returns:
+            int: The number of readings appended.
+        """
+        self._buffer += chunk
+        end = self._buffer.rfind(b"\n") + 1
+        if end == 0:
+            return 0
+
+        start = 0
+        if not self.synchronized:
+            start = self._buffer.find(b"\n") + 1
+            self.synchronized = True
+
+        text = bytes(memoryview(self._buffer)[start:end]).translate(_NUMERIC)
+        del self._buffer[:end]
+
+        try:
+            ranges = np.fromstring(text, sep=" ")
+        except ValueError:
+            ranges = self._parse_slowly(text)
+
+        if self.line_period is not None:
+            if self._origin is None:
+                self._origin = timestamp
+            timestamp = self._origin + self.line_period * (self._lines + np.arange(len(ranges)))
+            self._lines += len(ranges)
+
+        # pulseIn() times out to a distance of zero when there is no echo.
+        valid = ranges > 0
+        batch.extend(self.anchor, timestamp if np.isscalar(timestamp) else timestamp[valid],
+                     ranges[valid] * self.scale)
+
+        return int(np.count_nonzero(valid))
+
+
+    def _parse_slowly(self, text: bytes) -> np.ndarray:
+        """Parses token by token, skipping corrupt tokens (e.g. line noise)."""
+        ranges = []
+        for token in text.split():
+            try:
+                ranges.append(float(token))
+            except ValueError:
+                self.malformed += 1
+
+        return np.array(ranges, dtype=float)
+
+
+class RangeAggregator():
+    """Combines readings from separate anchors into complete range vectors. A
+    vector is emitted once every anchor has reported since the last one, as
+    long as the readings are close enough together to describe one position.
+    """
+
+    def __init__(self, anchor_count: int, max_age: float = 0.3):
+        """
+        Args:
+            anchor_count (int): The number of anchors.
+            max_age (float): The largest spread of timestamps, in seconds,
+                allowed within one range vector.
+        """
+        self.max_age = max_age
+        self.ranges = np.full(anchor_count, np.nan)
+        self.timestamps = np.full(anchor_count, -np.inf)
+        self._fresh = np.zeros(anchor_count, dtype=bool)
+
+
+    def update(self, readings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Consumes readings in timestamp order.
+
+        Args:
+            readings (np.ndarray): Readings with READING_DTYPE.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The (M,) time of and (M, K) ranges
+                in every completed range vector.
+        """
+        times, vectors = [], []
+
+        for reading in np.sort(readings, order="timestamp"):
+            anchor = reading["anchor"]
+            self.ranges[anchor] = reading["range"]
+            self.timestamps[anchor] = reading["timestamp"]
+            self._fresh[anchor] = True
+
+            if self._fresh.all() and np.ptp(self.timestamps) <= self.max_age:
+                times.append(reading["timestamp"])
+                vectors.append(self.ranges.copy())
+                self._fresh[:] = False
+
+        return np.array(times), np.array(vectors).reshape(-1, len(self.ranges))
+
+
+def _configure_serial(fd: int, baudrate: int) -> None:
+    """Puts a terminal device in raw mode at the firmware's baud rate."""
+    import termios
+    import tty
+
+    tty.setraw(fd)
+    attributes = termios.tcgetattr(fd)
+    attributes[4] = attributes[5] = getattr(termios, f"B{baudrate}")
+    termios.tcsetattr(fd, termios.TCSANOW, attributes)
+
+
+async def read_stream(path: str, parser: LineParser, batch: ReadingBatch,
+                      baudrate: int = 9600, chunk_size: int = 4096,
+                      line_period: float = 0.1) -> None:
+    """Reads one sensor until its stream ends.
+
+    Serial ports, pseudo-terminals and pipes are read through the event loop.
+    A regular file stands in for a recorded session and is read as fast as
+    possible, yielding to the other streams between chunks. Its readings are
+    stamped as if they had arrived at the firmware's rate, so that files for
+    separate anchors line up with each other.
+
+    Args:
+        path (str): The serial port, pseudo-terminal, pipe or file to read.
+        parser (LineParser): The parser for this stream's anchor.
+        batch (ReadingBatch): Where to append the readings.
+        baudrate (int): The baud rate to configure terminal devices with.
+        chunk_size (int): The most bytes to read at once.
+        line_period (float): The time between lines in a file stand-in, the
+            firmware's delay(100).
+    """
+    if stat.S_ISREG(os.stat(path).st_mode):
+        parser.synchronized = True
+        parser.line_period = line_period
+        with open(path, "rb", buffering=0) as file:
+            while chunk := file.read(chunk_size):
+                parser.feed(chunk, time.monotonic(), batch)
+                await asyncio.sleep(0)
+        return
+
+    fd = os.open(path, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+    if os.isatty(fd):
+        _configure_serial(fd, baudrate)
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", buffering=0))
+
+    try:
+        while chunk := await reader.read(chunk_size):
+            parser.feed(chunk, time.monotonic(), batch)
+    except OSError as error:
+        # A pseudo-terminal reports EIO rather than EOF once its other end
+        # closes, as does a serial adapter which is unplugged.
+        if error.errno != errno.EIO:
+            raise
+    finally:
+        transport.close()
+
+
+async def ingest(paths: Sequence[str], anchors,
+                 on_fixes: Callable[[np.ndarray, np.ndarray], None],
+                 scale: float = 1.0, flush_interval: float = 0.1,
+                 max_age: float = 0.3, baudrate: int = 9600) -> int:
+    """Reads every sensor concurrently and trilaterates the readings in batches
+    until all of the streams end.
+
+    Args:
+        paths (Sequence[str]): One stream per anchor, in the order of anchors.
+        anchors (array-like): The (K, D) calculated coordinates of the anchors.
+        on_fixes (Callable): Called with the (M,) times and (M, D) positions
+            of each batch of fixes.
+        scale (float): Converts centimetres to the units of the anchors.
+        flush_interval (float): How often to trilaterate, in seconds.
+        max_age (float): See RangeAggregator.
+        baudrate (int): The baud rate of the sensors.
+
+    Returns:
+        int: The total number of fixes.
+    """
+    anchors = np.asarray(anchors, dtype=float)
+    batch = ReadingBatch()
+    aggregator = RangeAggregator(len(paths), max_age)
+    parsers = [LineParser(anchor, scale) for anchor in range(len(paths))]
+    readers = [asyncio.create_task(read_stream(path, parser, batch, baudrate))
+               for path, parser in zip(paths, parsers)]
+    fixes = 0
+
+    def flush() -> None:
+        nonlocal fixes
+        times, ranges = aggregator.update(batch.drain())
+        if len(ranges):
+            on_fixes(times, trilaterate_batch(anchors, ranges))
+            fixes += len(ranges)
+
+    pending = set(readers)
+    while pending:
+        _, pending = await asyncio.wait(pending, timeout=flush_interval)
+        flush()
+
+    # Surface any error which ended a stream.
+    await asyncio.gather(*readers)
+
+    return fixes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("Purpose:")[1].split("Usage:")[0])
+    parser.add_argument("paths", nargs="+", help="one serial port per anchor")
+    # One option per anchor, written --anchor=X,Y so that a negative x is
+    # not mistaken for an option
+    parser.add_argument("--anchor", dest="anchors", action="append", required=True,
+                        metavar="X,Y", help="the coordinates of one anchor, repeated "
+                        "once per path in path order, e.g. --anchor=-20,20")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiplies each reading (in cm) into anchor units")
+    parser.add_argument("--baudrate", type=int, default=9600)
+    args = parser.parse_args()
+
+    if len(args.anchors) != len(args.paths):
+        parser.error("give exactly one anchor per path")
+    anchor_coordinates = [tuple(map(float, anchor.split(","))) for anchor in args.anchors]
+
+    def print_fixes(times, positions):
+        for timestamp, position in zip(times, positions):
+            print(f"{timestamp:.3f}: ({position[0]:.3f}, {position[1]:.3f})")
+
+    asyncio.run(ingest(args.paths, anchor_coordinates, print_fixes,
+                       scale=args.scale, baudrate=args.baudrate))
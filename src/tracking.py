@@ -0,0 +1,318 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Filters which track a moving tag across successive sets of
+                ranges, instead of solving every set from scratch.
+Usage:          from tracking import ExtendedKalmanFilter, ParticleFilter
+============================================================================="""
+
+from typing import Tuple
+
+import numpy as np
+
+from trilateration import (SolverResult, hemisphere_trilateration, linear_trilateration,
+                           range_residuals)
+
+
+class ExtendedKalmanFilter():
+    """Tracks a tag's position and velocity with a constant-velocity extended
+    Kalman filter. Each set of ranges is one measurement update, linearized
+    around the predicted position, so an update costs a few small matrix
+    products no matter how long the tag has been tracked.
+    """
+
+    def __init__(self, dimensions: int = 2, range_sigma: float = 0.5,
+                 acceleration_sigma: float = 5.0):
+        """
+        Args:
+            dimensions (int): The number of position coordinates.
+            range_sigma (float): The standard deviation of range noise.
+            acceleration_sigma (float): The standard deviation of the tag's
+                acceleration, which is how quickly the filter lets the
+                velocity change. Larger values follow sharp turns more
+                closely but smooth less.
+        """
+        self.dimensions = dimensions
+        self.range_sigma = range_sigma
+        self.acceleration_sigma = acceleration_sigma
+        self.state = None
+        self.covariance = None
+        self.timestamp = None
+
+
+    @property
+    def position(self) -> np.ndarray:
+        return self.state[:self.dimensions]
+
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self.state[self.dimensions:]
+
+
+    def initialize(self, position, timestamp: float) -> None:
+        """Starts tracking from a known position, at rest."""
+        self.state = np.concatenate([np.asarray(position, dtype=float),
+                                     np.zeros(self.dimensions)])
+        self.covariance = np.diag([4 * self.range_sigma**2] * self.dimensions
+                                  + [self.acceleration_sigma**2] * self.dimensions)
+        self.timestamp = timestamp
+
+
+    def predict(self, timestamp: float) -> None:
+        """Moves the state forward to a new time at constant velocity."""
+        dt = max(timestamp - self.timestamp, 0.0)
+        self.timestamp = timestamp
+        if dt == 0:
+            return
+
+        identity = np.eye(self.dimensions)
+        transition = np.block([[identity, dt * identity],
+                               [np.zeros_like(identity), identity]])
+        # Process noise of a white-noise acceleration model.
+        noise = self.acceleration_sigma**2 * np.block(
+            [[dt**4 / 4 * identity, dt**3 / 2 * identity],
+             [dt**3 / 2 * identity, dt**2 * identity]])
+
+        self.state = transition @ self.state
+        self.covariance = transition @ self.covariance @ transition.T + noise
+
+
+    def update(self, anchors: np.ndarray, ranges: np.ndarray) -> None:
+        """Corrects the state with one set of ranges."""
+        offsets = self.position - anchors
+        distances = np.maximum(np.linalg.norm(offsets, axis=1), 1e-12)
+
+        # The Jacobian of each range is the unit vector from the anchor, and
+        # ranges do not depend on velocity.
+        jacobian = np.zeros((len(anchors), 2 * self.dimensions))
+        jacobian[:, :self.dimensions] = offsets / distances[:, None]
+
+        innovation = ranges - distances
+        innovation_covariance = jacobian @ self.covariance @ jacobian.T \
+            + self.range_sigma**2 * np.eye(len(anchors))
+        gain = np.linalg.solve(innovation_covariance, jacobian @ self.covariance).T
+
+        self.state = self.state + gain @ innovation
+        # The Joseph form keeps the covariance symmetric and positive definite.
+        correction = np.eye(len(self.state)) - gain @ jacobian
+        self.covariance = correction @ self.covariance @ correction.T \
+            + self.range_sigma**2 * gain @ gain.T
+
+
+    def step(self, anchors, ranges, timestamp: float) -> SolverResult:
+        """Runs one predict and update cycle, starting the track from a closed
+        form fix if this is the first set of ranges. In 3D the fix comes from
+        hemisphere_trilateration, as the anchors are usually flat there.
+
+        Args:
+            anchors (array-like): The (K, D) coordinates of the anchors.
+            ranges (array-like): The (K,) measured ranges to each anchor.
+            timestamp (float): When the ranges were measured, in seconds.
+
+        Returns:
+            SolverResult: The filtered position.
+        """
+        anchors = np.asarray(anchors, dtype=float)
+        ranges = np.asarray(ranges, dtype=float)
+
+        if self.state is None:
+            if self.dimensions == 3:
+                fix = hemisphere_trilateration(anchors, ranges)
+            else:
+                fix = linear_trilateration(anchors, ranges)
+            if not fix.success:
+                return SolverResult(fix.x, False, fix.fun, 1, "ekf")
+            self.initialize(fix.x, timestamp)
+        else:
+            self.predict(timestamp)
+            self.update(anchors, ranges)
+
+        position = self.position.copy()
+        residual = float(np.sqrt(np.mean(range_residuals(position, anchors, ranges)**2)))
+
+        return SolverResult(position, bool(np.all(np.isfinite(position))),
+                            residual, 1, "ekf")
+
+
+def systematic_resample(weights: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Draws as many particle indices as there are weights, using one random
+    offset for an evenly spaced comb over the cumulative weights.
+
+    Args:
+        weights (np.ndarray): The (N,) normalized particle weights.
+        rng (np.random.Generator): The source of the random offset.
+
+    Returns:
+        np.ndarray: The (N,) indices of the particles to keep.
+    """
+    positions = (rng.random() + np.arange(len(weights))) / len(weights)
+    cumulative = np.cumsum(weights)
+    cumulative[-1] = 1.0
+
+    return np.searchsorted(cumulative, positions)
+
+
+class ParticleFilter():
+    """Tracks a tag with a cloud of weighted particles. Unlike a single fix or
+    the extended Kalman filter, the cloud can hold every position which fits
+    the ranges, such as both intersections of three nearly collinear anchors'
+    circles, until later ranges tell them apart. Every particle is weighted in
+    one vectorized evaluation per set of ranges.
+    """
+
+    def __init__(self, dimensions: int = 2, particle_count: int = 10000,
+                 range_sigma: float = 0.5, motion_sigma: float = 5.0,
+                 resample_threshold: float = 0.5, rng: np.random.Generator = None):
+        """
+        Args:
+            dimensions (int): The number of position coordinates.
+            particle_count (int): The number of particles.
+            range_sigma (float): The standard deviation of range noise.
+            motion_sigma (float): How far the tag wanders at random in one
+                second, as the standard deviation of a random walk.
+            resample_threshold (float): Resample once the effective number of
+                particles falls below this fraction of them.
+            rng (np.random.Generator, optional): The source of randomness.
+        """
+        self.dimensions = dimensions
+        self.particle_count = particle_count
+        self.range_sigma = range_sigma
+        self.motion_sigma = motion_sigma
+        self.resample_threshold = resample_threshold
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.particles = None
+        self.weights = None
+        self.timestamp = None
+        # The (positions, masses) of modes() as of the last step, so that
+        # callers drawing them need not bin the cloud a second time
+        self.last_modes = None
+
+
+    def initialize(self, anchors: np.ndarray, ranges: np.ndarray,
+                   timestamp: float) -> None:
+        """Spreads the particles around the sphere (circle in 2D) of the
+        shortest range, so that every position consistent with it is covered.
+        """
+        nearest = np.argmin(ranges)
+        directions = self.rng.normal(size=(self.particle_count, self.dimensions))
+        directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+        radii = ranges[nearest] + self.rng.normal(scale=self.range_sigma,
+                                                  size=(self.particle_count, 1))
+
+        self.particles = anchors[nearest] + radii * directions
+        self.weights = np.full(self.particle_count, 1 / self.particle_count)
+        self.timestamp = timestamp
+
+
+    def predict(self, timestamp: float) -> None:
+        """Lets every particle wander for the time since the last update."""
+        dt = max(timestamp - self.timestamp, 0.0)
+        self.timestamp = timestamp
+        if dt == 0:
+            return
+
+        self.particles += self.rng.normal(scale=self.motion_sigma * np.sqrt(dt),
+                                          size=self.particles.shape)
+
+
+    def update(self, anchors: np.ndarray, ranges: np.ndarray) -> None:
+        """Reweights every particle by the likelihood of the ranges, and
+        resamples once too few particles carry the weight."""
+        distances = np.linalg.norm(self.particles[:, None, :] - anchors, axis=-1)
+        log_likelihood = -0.5 * np.sum(((distances - ranges) / self.range_sigma)**2,
+                                       axis=1)
+
+        # Weights are combined in the log domain, shifted by the largest, so
+        # that a set of ranges which fits no particle well does not underflow.
+        log_weights = np.log(self.weights) + log_likelihood
+        weights = np.exp(log_weights - log_weights.max())
+        self.weights = weights / weights.sum()
+
+        effective_count = 1 / np.sum(self.weights**2)
+        if effective_count < self.resample_threshold * self.particle_count:
+            indices = systematic_resample(self.weights, self.rng)
+            self.particles = self.particles[indices]
+            self.weights = np.full(self.particle_count, 1 / self.particle_count)
+
+
+    def modes(self, separation: float = 2.0, max_modes: int = 3,
+              min_weight: float = 0.05) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the distinct peaks of the posterior. Particles are binned into
+        cells, the heaviest cells at least 2 * separation apart become peaks,
+        and each peak is the weighted mean of the particles closest to it.
+
+        Args:
+            separation (float): The cell size, roughly the smallest distance
+                between two peaks.
+            max_modes (int): The most peaks to return.
+            min_weight (float): The smallest cell weight which can be a peak.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The (M, D) position and (M,) total
+                weight of each peak, heaviest first.
+        """
+        # Cells are numbered along one axis, which numpy deduplicates much
+        # faster than rows of coordinates.
+        cells = np.floor(self.particles / separation).astype(np.int64)
+        origin = cells.min(axis=0)
+        shape = tuple(cells.max(axis=0) - origin + 1)
+        keys, inverse = np.unique(np.ravel_multi_index((cells - origin).T, shape),
+                                  return_inverse=True)
+        mass = np.bincount(inverse, weights=self.weights, minlength=len(keys))
+        centers = (np.column_stack(np.unravel_index(keys, shape)) + origin + 0.5) * separation
+
+        peaks = []
+        for index in np.argsort(mass)[::-1]:
+            if len(peaks) == max_modes or mass[index] < min_weight:
+                break
+            if all(np.linalg.norm(centers[index] - centers[peak]) > 2 * separation
+                   for peak in peaks):
+                peaks.append(index)
+        if not peaks:
+            peaks = [np.argmax(mass)]
+
+        # Each particle near a peak belongs to the closest one
+        distances = np.linalg.norm(self.particles[:, None, :] - centers[peaks], axis=-1)
+        closest = np.argmin(distances, axis=1)
+        member = distances[np.arange(len(closest)), closest] <= 2 * separation
+        weights = np.where(member, self.weights, 0.0)
+
+        masses = np.bincount(closest, weights=weights, minlength=len(peaks))
+        positions = np.stack([
+            np.bincount(closest, weights=weights * self.particles[:, axis],
+                        minlength=len(peaks))
+            for axis in range(self.dimensions)], axis=1) / masses[:, None]
+
+        order = np.argsort(masses)[::-1]
+        return positions[order], masses[order]
+
+
+    def step(self, anchors, ranges, timestamp: float) -> SolverResult:
+        """Runs one predict and update cycle, starting the cloud from the
+        ranges themselves if this is the first set of them.
+
+        Args:
+            anchors (array-like): The (K, D) coordinates of the anchors.
+            ranges (array-like): The (K,) measured ranges to each anchor.
+            timestamp (float): When the ranges were measured, in seconds.
+
+        Returns:
+            SolverResult: The heaviest peak of the posterior.
+        """
+        anchors = np.asarray(anchors, dtype=float)
+        ranges = np.asarray(ranges, dtype=float)
+
+        if self.particles is None:
+            self.initialize(anchors, ranges, timestamp)
+        else:
+            self.predict(timestamp)
+        self.update(anchors, ranges)
+
+        self.last_modes = self.modes()
+        position = self.last_modes[0][0]
+        residual = float(np.sqrt(np.mean(range_residuals(position, anchors, ranges)**2)))
+
+        return SolverResult(position, bool(np.all(np.isfinite(position))),
+                            residual, self.particle_count, "particle")
@@ -0,0 +1,794 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Solvers which place a tag from its ranges to a set of anchors.
+Usage:          from trilateration import trilaterate
+============================================================================="""
+
+import itertools
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+
+@dataclass
+class SolverResult:
+    """The outcome of a single trilateration solve. Mirrors the fields of
+    scipy's OptimizeResult that BaseStation relies on.
+
+    Attributes:
+        x (np.ndarray): The estimated coordinates of the tag.
+        success (bool): Whether the solver produced a usable estimate.
+        fun (float): The root-mean-square range residual at x.
+        nfev (int): The number of objective evaluations the solver used.
+        method (str): The name of the solver that produced the estimate.
+    """
+    x: np.ndarray
+    success: bool
+    fun: float
+    nfev: int
+    method: str
+
+
+def range_residuals(position: np.ndarray, anchors: np.ndarray,
+                    ranges: np.ndarray) -> np.ndarray:
+    """Returns the difference between the distance from a position to each
+    anchor and the measured range to that anchor.
+
+    Args:
+        position (np.ndarray): The (D,) coordinates of the tag.
+        anchors (np.ndarray): The (K, D) coordinates of the anchors.
+        ranges (np.ndarray): The (K,) measured ranges to each anchor.
+
+    Returns:
+        np.ndarray: The (K,) range residuals.
+    """
+    return np.linalg.norm(anchors - position, axis=-1) - ranges
+
+
+def _rms(residuals: np.ndarray) -> float:
+    return float(np.sqrt(np.mean(residuals**2)))
+
+
+def _validate(anchors, ranges, spare: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Checks the shapes of the anchors and ranges, and that there are at
+    least D + spare anchors."""
+    anchors = np.asarray(anchors, dtype=float)
+    ranges = np.asarray(ranges, dtype=float)
+
+    if anchors.ndim < 2 or anchors.shape[-2] != ranges.shape[-1]:
+        raise ValueError("Expected (K, D) anchors and K ranges, got "
+                         f"{anchors.shape} and {ranges.shape}.")
+    if anchors.shape[-2] < anchors.shape[-1] + spare:
+        raise ValueError(f"At least {anchors.shape[-1] + spare} anchors are needed "
+                         f"to trilaterate in {anchors.shape[-1]}D.")
+
+    return anchors, ranges
+
+
+def _linear_system(anchors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the range-independent parts of the linearized range equations,
+    the design matrix 2 (a_i - a_0) and the constant |a_i|^2 - |a_0|^2.
+    """
+    reference = anchors[..., :1, :]
+    design = 2 * (anchors[..., 1:, :] - reference)
+    constant = np.sum(anchors[..., 1:, :]**2, axis=-1) - np.sum(reference**2, axis=-1)
+
+    return design, constant
+
+
+def linear_trilateration(anchors, ranges) -> SolverResult:
+    """Solves for the tag's position in closed form.
+
+    Subtracting the range equation of the first (reference) anchor from the
+    others cancels the quadratic term in the unknown position, leaving the
+    linear system
+
+        2 (a_i - a_0) . x = |a_i|^2 - |a_0|^2 - r_i^2 + r_0^2
+
+    which is solved in the least-squares sense for any number of anchors.
+
+    Args:
+        anchors (array-like): The (K, D) coordinates of the anchors, K > D.
+        ranges (array-like): The (K,) measured ranges to each anchor.
+
+    Returns:
+        SolverResult: The estimate. success is False when the anchors are
+            collinear (or coplanar in 3D) and the system is rank deficient.
+    """
+    anchors, ranges = _validate(anchors, ranges)
+
+    design, constant = _linear_system(anchors)
+    target = constant - ranges[1:]**2 + ranges[0]**2
+
+    position, _, rank, _ = np.linalg.lstsq(design, target, rcond=None)
+    residual = _rms(range_residuals(position, anchors, ranges))
+
+    return SolverResult(position, bool(rank == anchors.shape[1]), residual, 1,
+                        "linear")
+
+
+def trilaterate_batch(anchors, ranges) -> np.ndarray:
+    """Solves for many tag positions at once, using the closed form of
+    linear_trilateration. When every fix shares the same anchors the design
+    matrix only depends on them, so its pseudo-inverse is computed once and
+    every fix is a single matrix product.
+
+    Args:
+        anchors (array-like): The (K, D) coordinates of the anchors, K > D, or
+            an (N, K, D) stack with separate anchors for each fix.
+        ranges (array-like): The (N, K) measured ranges, one row per fix.
+
+    Raises:
+        ValueError: If shared anchors are degenerate. Degenerate anchors in a
+            stack instead give the minimum-norm solution for that fix.
+
+    Returns:
+        np.ndarray: The (N, D) estimated coordinates.
+    """
+    anchors, ranges = _validate(anchors, ranges)
+    ranges = np.atleast_2d(ranges)
+
+    design, constant = _linear_system(anchors)
+    squared = ranges**2
+    targets = constant - squared[:, 1:] + squared[:, :1]
+
+    if anchors.ndim == 3:
+        return np.einsum("nij,nj->ni", np.linalg.pinv(design), targets)
+
+    if np.linalg.matrix_rank(design) < anchors.shape[1]:
+        raise ValueError("The anchors are degenerate (collinear in 2D or "
+                         "coplanar in 3D) and cannot be trilaterated against.")
+
+    return targets @ np.linalg.pinv(design).T
+
+
+def _solve_positive_definite(matrices: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """Solves a stack of small symmetric positive definite systems by Gaussian
+    elimination, vectorized over the stack rather than calling LAPACK once per
+    system. Positive definite matrices need no pivoting.
+
+    Args:
+        matrices (np.ndarray): The (D, D, N) stack of matrices.
+        vectors (np.ndarray): The (D, N) stack of right-hand sides.
+
+    Returns:
+        np.ndarray: The (D, N) solutions.
+    """
+    matrices, vectors = matrices.copy(), vectors.copy()
+    dimensions = len(vectors)
+
+    for pivot in range(dimensions):
+        factors = matrices[pivot + 1:, pivot] / matrices[pivot, pivot]
+        matrices[pivot + 1:] -= factors[:, None] * matrices[pivot]
+        vectors[pivot + 1:] -= factors * vectors[pivot]
+
+    solutions = np.empty_like(vectors)
+    for row in reversed(range(dimensions)):
+        known = np.sum(matrices[row, row + 1:] * solutions[row + 1:], axis=0)
+        solutions[row] = (vectors[row] - known) / matrices[row, row]
+
+    return solutions
+
+
+def refine_batch(anchors: np.ndarray, ranges: np.ndarray, positions: np.ndarray,
+                 iterations: int = 3, damping: float = 1e-9) -> np.ndarray:
+    """Polishes many fixes against shared anchors with a few damped
+    Gauss-Newton steps on the range residuals, all fixes at once. The closed
+    form of trilaterate_batch fits squared ranges, so noise biases it; this
+    fits the ranges themselves. Started from the closed form, two or three
+    steps are enough.
+
+    Args:
+        anchors (np.ndarray): The (K, D) coordinates of the anchors.
+        ranges (np.ndarray): The (N, K) measured ranges, one row per fix.
+        positions (np.ndarray): The (N, D) starting fixes.
+        iterations (int): The number of steps to take.
+        damping (float): Keeps each step's normal equations invertible.
+
+    Returns:
+        np.ndarray: The (N, D) refined fixes.
+    """
+    dimensions = anchors.shape[1]
+    # Coordinates lead, so every per-coordinate slice below is contiguous.
+    positions = np.array(positions, dtype=float).T
+    hessian = np.empty((dimensions, dimensions, len(ranges)))
+
+    for _ in range(iterations):
+        offsets = positions[:, :, None] - anchors.T[:, None, :]
+        distances = np.maximum(np.sqrt(np.einsum("dnk,dnk->nk", offsets, offsets)), 1e-12)
+        jacobian = offsets / distances
+        residuals = distances - ranges
+
+        for row in range(dimensions):
+            for column in range(row, dimensions):
+                hessian[row, column] = hessian[column, row] = np.einsum(
+                    "nk,nk->n", jacobian[row], jacobian[column])
+            hessian[row, row] += damping
+        gradient = np.einsum("dnk,nk->dn", jacobian, residuals)
+
+        positions -= _solve_positive_definite(hessian, gradient)
+
+    return positions.T
+
+
+def _localize_chunk(anchors: np.ndarray, ranges: np.ndarray, refine: bool,
+                    flat: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    if flat:
+        positions = _hemisphere_batch(anchors, ranges)[0]
+    else:
+        positions = trilaterate_batch(anchors, ranges)
+    if refine:
+        positions = refine_batch(anchors, ranges, positions)
+
+    residuals = np.linalg.norm(positions[:, None, :] - anchors, axis=-1) - ranges
+    return positions, np.sqrt(np.mean(residuals**2, axis=1))
+
+
+def localize_tags(anchors, ranges, refine: bool = True, workers: int = None,
+                  chunk_size: int = 200000) -> Tuple[np.ndarray, np.ndarray]:
+    """Localizes any number of independent tags against the same anchors.
+    Each chunk of tags is one vectorized batch, and chunks are spread across
+    a process pool when there is more than one.
+
+    In 3D, anchors which are flat (see hemisphere_trilateration()), or only
+    three, place every tag below them, as victims are buried.
+
+    Args:
+        anchors (array-like): The (K, D) coordinates of the anchors, K > D,
+            or K = D in 3D.
+        ranges (array-like): The (N, K) measured ranges, one row per tag.
+        refine (bool): Whether to polish the closed-form fixes, see
+            refine_batch().
+        workers (int, optional): The number of processes to spread chunks
+            across. Defaults to one per core, and 1 keeps every chunk in this
+            process.
+        chunk_size (int): The most tags to solve in one batch.
+
+    Raises:
+        ValueError: If the anchors are degenerate.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (N, D) fixes and the (N,) RMS range
+            residual of each tag.
+    """
+    anchors = np.asarray(anchors, dtype=float)
+    flat = anchors.ndim == 2 and anchors.shape[1] == 3 and _is_flat(anchors, 0.1)
+    anchors, ranges = _validate(anchors, ranges, spare=0 if flat else 1)
+    ranges = np.atleast_2d(ranges)
+
+    if len(ranges) <= chunk_size or workers == 1:
+        chunks = [_localize_chunk(anchors, ranges[start:start + chunk_size], refine, flat)
+                  for start in range(0, len(ranges), chunk_size)]
+    else:
+        # Imported here, as most callers never need a process pool.
+        from concurrent.futures import ProcessPoolExecutor
+
+        parts = [ranges[start:start + chunk_size]
+                 for start in range(0, len(ranges), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(_localize_chunk, [anchors] * len(parts),
+                                       parts, [refine] * len(parts),
+                                       [flat] * len(parts)))
+
+    if not chunks:
+        return np.empty((0, anchors.shape[1])), np.empty(0)
+
+    positions, residuals = zip(*chunks)
+    return np.concatenate(positions), np.concatenate(residuals)
+
+
+def levenberg_marquardt_trilateration(anchors, ranges, initial_guess,
+                                      max_iterations: int = 20,
+                                      tolerance: float = 1e-9,
+                                      damping: float = 1e-3) -> SolverResult:
+    """Refines an initial guess of the tag's position with a local
+    Levenberg-Marquardt solve of the range residuals.
+
+    The Jacobian of each residual |x - a_i| - r_i is the unit vector from the
+    anchor to x, so every iteration is a handful of array operations. Started
+    near the answer this converges in two or three iterations, but like any
+    local method it can settle in the wrong minimum when started far away.
+
+    Args:
+        anchors (array-like): The (K, D) coordinates of the anchors, K >= D.
+            With K = D the ranges only fix the tag up to a mirror image, and
+            the guess decides which one.
+        ranges (array-like): The (K,) measured ranges to each anchor.
+        initial_guess (array-like): The (D,) starting coordinates.
+        max_iterations (int): The maximum number of iterations to run.
+        tolerance (float): The relative step size at which to stop.
+        damping (float): The initial Levenberg-Marquardt damping factor.
+
+    Returns:
+        SolverResult: The estimate.
+    """
+    anchors, ranges = _validate(anchors, ranges, spare=0)
+    position = np.array(initial_guess, dtype=float)
+    identity = np.eye(anchors.shape[1])
+
+    offsets = position - anchors
+    distances = np.linalg.norm(offsets, axis=1)
+    residuals = distances - ranges
+    cost = residuals @ residuals
+    nfev = 1
+    converged = False
+
+    for _ in range(max_iterations):
+        # Guard against the guess sitting exactly on an anchor.
+        jacobian = offsets / np.maximum(distances, 1e-12)[:, None]
+        hessian = jacobian.T @ jacobian
+        gradient = jacobian.T @ residuals
+
+        step = np.linalg.solve(hessian + damping * identity, -gradient)
+        candidate = position + step
+
+        candidate_offsets = candidate - anchors
+        candidate_distances = np.linalg.norm(candidate_offsets, axis=1)
+        candidate_residuals = candidate_distances - ranges
+        candidate_cost = candidate_residuals @ candidate_residuals
+        nfev += 1
+
+        if candidate_cost < cost:
+            position, offsets, distances = candidate, candidate_offsets, candidate_distances
+            residuals, cost = candidate_residuals, candidate_cost
+            damping /= 10
+        else:
+            damping *= 10
+
+        if np.linalg.norm(step) <= tolerance * (np.linalg.norm(position) + tolerance):
+            converged = True
+            break
+
+    return SolverResult(position, bool(converged or cost < tolerance),
+                        _rms(residuals), nfev, "levenberg_marquardt")
+
+
+def tracking_trilateration(anchors, ranges, initial_guess,
+                           residual_threshold: float = 1.0,
+                           fallback: str = "differential_evolution") -> SolverResult:
+    """Solves for a tag which moves a little between updates. The previous fix
+    seeds a Levenberg-Marquardt solve, and the global fallback solver only
+    runs when the local solve fails or leaves a residual above the threshold
+    (e.g. after the tag jumps, or when the local solve lands in a mirror
+    image of the true position).
+
+    Args:
+        anchors (array-like): The (K, D) coordinates of the anchors, K > D.
+        ranges (array-like): The (K,) measured ranges to each anchor.
+        initial_guess (array-like): The previous fix of the tag.
+        residual_threshold (float): The largest acceptable root-mean-square
+            range residual, in the same units as the ranges.
+        fallback (str): The name of the solver in SOLVERS to escalate to.
+
+    Returns:
+        SolverResult: The estimate. method records which solver produced it.
+    """
+    result = levenberg_marquardt_trilateration(anchors, ranges, initial_guess)
+
+    if result.success and result.fun <= residual_threshold:
+        return result
+
+    escalated = trilaterate(anchors, ranges, method=fallback)
+    escalated.nfev += result.nfev
+
+    return escalated
+
+
+def differential_evolution_trilateration(anchors, ranges,
+                                         bounds: Tuple[float, float] = (-100, 100)
+                                         ) -> SolverResult:
+    """Solves for the tag's position with a global search over a bounding box.
+    This is the original solver and is orders of magnitude slower than
+    linear_trilateration, so it is only kept as an explicit fallback.
+
+    Args:
+        anchors (array-like): The (K, D) coordinates of the anchors.
+        ranges (array-like): The (K,) measured ranges to each anchor.
+        bounds (Tuple[float, float]): The search interval for every coordinate.
+
+    Returns:
+        SolverResult: The estimate.
+    """
+    # Imported here so that the fast paths never pay for loading scipy.
+    from scipy.optimize import differential_evolution
+
+    anchors, ranges = _validate(anchors, ranges)
+
+    def trilateration_callback(unknowns):
+        squared_distances = np.sum((anchors - unknowns)**2, axis=1)
+        return np.sum(np.abs(squared_distances - ranges**2))
+
+    result = differential_evolution(trilateration_callback,
+                                    [bounds] * anchors.shape[1])
+    residual = _rms(range_residuals(result.x, anchors, ranges))
+
+    return SolverResult(result.x, bool(result.success), residual,
+                        int(result.nfev), "differential_evolution")
+
+
+def _squared_error(points: np.ndarray, anchors: np.ndarray,
+                   ranges: np.ndarray) -> np.ndarray:
+    """Returns the sum of squared range residuals at every point of a (..., D)
+    array."""
+    distances = np.linalg.norm(points[..., None, :] - anchors, axis=-1)
+    return np.sum((distances - ranges)**2, axis=-1)
+
+
+def grid_trilateration(anchors, ranges, bounds: Tuple[float, float] = None,
+                       precision: float = 0.01, candidates: int = 4,
+                       coarse_points: int = 4096,
+                       max_iterations: int = 100) -> SolverResult:
+    """Solves for the tag's position by searching the squared range residuals
+    on a grid, as archive/formula_ayden.py does, but coarse to fine. A coarse
+    grid over the whole search box picks out the deepest few local minima, and
+    each one is then searched again on a finer grid spanning only the cells
+    around it, until the grid spacing reaches the requested precision. Keeping
+    several minima stops the search from committing early to the wrong one of
+    two mirror-image solutions. Each candidate, and its mirror image through
+    the anchors' best-fit plane, is then finished with Levenberg-Marquardt,
+    and the best fit wins.
+
+    Args:
+        anchors (array-like): The (K, D) coordinates of the anchors.
+        ranges (array-like): The (K,) measured ranges to each anchor.
+        bounds (Tuple[float, float], optional): The search interval for every
+            coordinate. Defaults to the box holding every anchor's sphere.
+        precision (float): The grid spacing to stop at.
+        candidates (int): The number of local minima to refine.
+        coarse_points (int): The number of points in the coarse grid.
+        max_iterations (int): The most refinement steps.
+
+    Returns:
+        SolverResult: The best fit found. It is unsuccessful when that fit is
+            off by more than precision and a distinct candidate fits about as
+            well.
+    """
+    anchors, ranges = _validate(anchors, ranges)
+    dimensions = anchors.shape[1]
+
+    if bounds is None:
+        lower = np.min(anchors - ranges[:, None], axis=0)
+        upper = np.max(anchors + ranges[:, None], axis=0)
+    else:
+        lower = np.full(dimensions, float(bounds[0]))
+        upper = np.full(dimensions, float(bounds[1]))
+
+    # The coarse grid, searched for local minima
+    count = max(8, int(round(coarse_points ** (1 / dimensions))))
+    axes = [np.linspace(low, high, count) for low, high in zip(lower, upper)]
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1)
+    errors = _squared_error(grid, anchors, ranges)
+    evaluations = errors.size
+
+    padded = np.pad(errors, 1, constant_values=np.inf)
+    minimum = np.ones(errors.shape, dtype=bool)
+    for axis in range(dimensions):
+        for shift in (0, 2):
+            neighbours = np.take(padded, np.arange(shift, shift + count), axis=axis)
+            neighbours = neighbours[tuple(slice(1, -1) if other != axis else slice(None)
+                                          for other in range(dimensions))]
+            minimum &= errors <= neighbours
+
+    indices = np.flatnonzero(minimum)
+    indices = indices[np.argsort(errors.ravel()[indices])[:candidates]]
+    centers = grid.reshape(-1, dimensions)[indices]
+    spacing = (upper - lower) / (count - 1)
+
+    # Each candidate is refined on a 9-point-per-axis grid spanning two cells
+    # either side of it. The grid is recentred on its best point, and only
+    # shrinks (halving the spacing) once that point is inside the grid rather
+    # than on its edge, so a candidate can slide along the long, narrow valley
+    # of a poor anchor geometry.
+    steps = np.linspace(-2, 2, 9)
+    offsets = np.stack(np.meshgrid(*[steps] * dimensions, indexing="ij"),
+                       axis=-1).reshape(-1, dimensions)
+    interior = np.all(np.abs(offsets) < 2, axis=1)
+    spacing = np.tile(spacing, (len(centers), 1))
+
+    for _ in range(max_iterations):
+        active = np.max(spacing, axis=1) > precision
+        if not active.any():
+            break
+
+        points = centers[active, None, :] + offsets * spacing[active, None, :]
+        errors = _squared_error(points, anchors, ranges)
+        evaluations += errors.size
+
+        best = np.argmin(errors, axis=1)
+        centers[active] = points[np.arange(len(best)), best]
+        shrink = np.flatnonzero(active)[interior[best]]
+        spacing[shrink] /= 2
+
+    # The grid only brackets each minimum to its spacing, and in a shallow
+    # valley that can still be far from the bottom, so every candidate is
+    # finished with Levenberg-Marquardt. Near-flat anchors put a second
+    # minimum close to the mirror image of each one, often within a single
+    # coarse cell, so the mirror images are finished too.
+    centre = anchors.mean(axis=0)
+    normal = np.linalg.svd(anchors - centre)[2][-1]
+    mirrors = centers - 2 * ((centers - centre) @ normal)[:, None] * normal
+    results = [levenberg_marquardt_trilateration(anchors, ranges, center)
+               for center in np.concatenate([centers, mirrors])]
+    funs = np.array([result.fun for result in results])
+    best = results[int(np.argmin(funs))]
+    evaluations += sum(result.nfev for result in results)
+
+    # A best fit which is clearly off, with a different position fitting
+    # about as badly, means the ranges do not pick out one answer.
+    separation = np.max(upper - lower) / (count - 1)
+    distinct = np.linalg.norm(np.array([result.x for result in results]) - best.x,
+                              axis=1) > separation
+    ambiguous = best.fun > precision and np.any(distinct & (funs <= 2 * best.fun))
+
+    return SolverResult(best.x, bool(best.success and not ambiguous
+                                     and np.all(np.isfinite(best.x))),
+                        best.fun, evaluations, "grid")
+
+
+def ransac_trilateration(anchors, ranges, inlier_threshold: float = 1.0) -> SolverResult:
+    """Solves for the tag's position when some ranges may be outliers, such
+    as multipath echoes off snow. Every minimal subset of D + 1 anchors is a
+    hypothesis, solved all at once in closed form with trilaterate_batch.
+    Every hypothesis is scored against every range in one pass, and the one
+    with the most inliers (ties going to the smallest inlier residuals) is
+    refined by Levenberg-Marquardt on its inliers alone.
+
+    Args:
+        anchors (array-like): The (K, D) coordinates of the anchors, K > D.
+            Outliers can only be rejected when K > D + 1.
+        ranges (array-like): The (K,) measured ranges to each anchor.
+        inlier_threshold (float): The largest range residual of an inlier, in
+            the same units as the ranges.
+
+    Returns:
+        SolverResult: The estimate. fun is the RMS residual of the inliers
+            only, and success is False when fewer than D + 1 ranges agree
+            (with more than D + 1 anchors).
+    """
+    anchors, ranges = _validate(anchors, ranges)
+    dimensions = anchors.shape[1]
+
+    subsets = np.array(list(itertools.combinations(range(len(anchors)), dimensions + 1)))
+    hypotheses = trilaterate_batch(anchors[subsets], ranges[subsets])
+
+    residuals = np.linalg.norm(anchors - hypotheses[:, None, :], axis=-1) - ranges
+    inliers = np.abs(residuals) <= inlier_threshold
+    # Most inliers first, then the smallest squared residual over them.
+    score = np.sum(np.where(inliers, residuals**2, 0), axis=1)
+    best = np.lexsort((score, -inliers.sum(axis=1)))[0]
+    consensus = inliers[best]
+    if len(subsets) == 1:
+        # A single minimal subset has nothing to vote against, so every range
+        # is kept, as linear_trilateration would.
+        consensus[:] = True
+
+    if consensus.sum() < dimensions + 1:
+        residual = _rms(range_residuals(hypotheses[best], anchors, ranges))
+        return SolverResult(hypotheses[best], False, residual, len(subsets), "ransac")
+
+    result = levenberg_marquardt_trilateration(anchors[consensus], ranges[consensus],
+                                               hypotheses[best])
+    result.nfev += len(subsets)
+    result.method = "ransac"
+
+    return result
+
+
+def _is_flat(anchors: np.ndarray, flatness: float) -> bool:
+    """Returns whether the (K, D) anchors are too flat for the closed form of
+    linear_trilateration: K = D, or their spread along their best-fit
+    plane's normal is at most flatness times their largest spread."""
+    count, dimensions = anchors.shape
+    if count <= dimensions:
+        return True
+    spread = np.linalg.svd(anchors - anchors.mean(axis=0), compute_uv=False)
+    return bool(spread[dimensions - 1] <= flatness * spread[0])
+
+
+def _hemisphere_batch(anchors: np.ndarray, ranges: np.ndarray,
+                      side=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """Places many tags against flat anchors without refinement, as
+    hemisphere_trilateration() starts out.
+
+    Args:
+        anchors (np.ndarray): The (K, D) coordinates of the anchors.
+        ranges (np.ndarray): The (N, K) measured ranges, one row per tag.
+        side (array-like, optional): See hemisphere_trilateration().
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, int]: The (N, D) positions,
+            the (N,) heights of the tags above the plane, the (D,) normal
+            of the plane pointing to side, and the rank of the in-plane
+            system, which is D - 1 unless the anchors are degenerate.
+    """
+    dimensions = anchors.shape[1]
+    centre = anchors.mean(axis=0)
+    _, _, basis = np.linalg.svd(anchors - centre)
+
+    normal = basis[dimensions - 1]
+    if side is None:
+        side = -np.eye(dimensions)[-1]
+    if normal @ np.asarray(side, dtype=float) < 0:
+        normal = -normal
+
+    # The closed form within the plane, where every anchor shares the tag's
+    # height above it, so it cancels along with the quadratic terms.
+    planar = (anchors - centre) @ basis[:dimensions - 1].T
+    design, constant = _linear_system(planar)
+    squared = ranges**2
+    targets = constant - squared[:, 1:] + squared[:, :1]
+    within = targets @ np.linalg.pinv(design).T
+    rank = np.linalg.matrix_rank(design)
+
+    offsets = np.sum((planar[None, :, :] - within[:, None, :])**2, axis=-1)
+    heights = np.sqrt(np.maximum(np.mean(squared - offsets, axis=1), 0))
+    positions = centre + within @ basis[:dimensions - 1] + heights[:, None] * normal
+
+    return positions, heights, normal, rank
+
+
+def hemisphere_trilateration(anchors, ranges, side=None,
+                             flatness: float = 0.1) -> SolverResult:
+    """Solves for the tag's position when the anchors are (nearly) flat, such
+    as anchors staked out on a slope above buried victims in 3D. The ranges
+    to flat anchors cannot tell the tag apart from its mirror image through
+    their plane, and the closed form of linear_trilateration is then rank
+    deficient or amplifies noise along the plane's normal.
+
+    Instead, the position within the best-fit plane of the anchors comes from
+    the closed form in that plane, its distance from the plane from the
+    ranges, and the side of the plane from side. A Levenberg-Marquardt solve
+    from there accounts for anchors lying slightly off the plane. With more
+    than D anchors, the mirror image is solved too and kept if it fits the
+    ranges much better. Anchors which are not flat fall through to
+    linear_trilateration.
+
+    Args:
+        anchors (array-like): The (K, D) coordinates of the anchors, K >= D,
+            so three anchors are enough in 3D.
+        ranges (array-like): The (K,) measured ranges to each anchor.
+        side (array-like, optional): A (D,) direction pointing to the side of
+            the anchors the tag is on. Defaults to down the last axis, i.e.
+            below the anchors in a frame where z points up.
+        flatness (float): How small the anchors' spread along the plane's
+            normal must be, relative to their largest spread, to count as
+            flat.
+
+    Returns:
+        SolverResult: The estimate.
+    """
+    anchors, ranges = _validate(anchors, ranges, spare=0)
+    count, dimensions = anchors.shape
+
+    if not _is_flat(anchors, flatness):
+        return linear_trilateration(anchors, ranges)
+
+    guesses, heights, normal, rank = _hemisphere_batch(anchors, ranges[None], side)
+    guess, height = guesses[0], heights[0]
+
+    result = levenberg_marquardt_trilateration(anchors, ranges, guess)
+    if count > dimensions:
+        # Anchors off the plane can tell the sides apart after all, when the
+        # tag is clearly on the far side from side, e.g. a rescuer above them.
+        # Otherwise the noise in the ranges decides, so side is preferred.
+        mirror = levenberg_marquardt_trilateration(anchors, ranges,
+                                                   guess - 2 * height * normal)
+        if mirror.fun < 0.5 * result.fun:
+            mirror.nfev += result.nfev
+            result = mirror
+        else:
+            result.nfev += mirror.nfev
+    result.nfev += 1
+    result.success = result.success and bool(rank == dimensions - 1)
+    result.method = "hemisphere"
+
+    return result
+
+
+# Every solver which can be selected by name through trilaterate().
+SOLVERS = {
+    "linear": linear_trilateration,
+    "levenberg_marquardt": levenberg_marquardt_trilateration,
+    "tracking": tracking_trilateration,
+    "grid": grid_trilateration,
+    "ransac": ransac_trilateration,
+    "hemisphere": hemisphere_trilateration,
+    "differential_evolution": differential_evolution_trilateration,
+}
+
+
+def trilaterate(anchors, ranges, method: str = "linear", **kwargs) -> SolverResult:
+    """Places a tag from its ranges to a set of anchors.
+
+    Args:
+        anchors (array-like): The (K, D) coordinates of the anchors.
+        ranges (array-like): The (K,) measured ranges to each anchor.
+        method (str): The name of a solver in SOLVERS.
+        **kwargs: Extra arguments forwarded to the solver.
+
+    Returns:
+        SolverResult: The estimate.
+    """
+    try:
+        solver = SOLVERS[method]
+    except KeyError:
+        raise ValueError(f"Unknown trilateration method '{method}'. "
+                         f"Choose from: {', '.join(SOLVERS)}.") from None
+
+    return solver(anchors, ranges, **kwargs)
+
+
+# Solvers whose result also depends on where the tag was last seen, and so
+# cannot be looked up by ranges alone.
+WARM_STARTED = {"levenberg_marquardt", "tracking"}
+
+
+class SolverCache():
+    """A bounded least-recently-used cache in front of trilaterate(). Results
+    are keyed on the anchor geometry version, the method and the ranges
+    rounded to a fixed resolution, so a tag which holds still (or a cursor
+    which jitters over the same pixels) is only solved once.
+
+    Cached results are shared between hits and must not be modified.
+    """
+
+    def __init__(self, capacity: int = 256, resolution: float = 0.01):
+        """
+        Args:
+            capacity (int): The most results to keep.
+            resolution (float): Ranges closer than this are treated as the
+                same, in the same units as the ranges.
+        """
+        self.capacity = capacity
+        self.resolution = resolution
+        self._results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def solve(self, anchors, ranges, geometry_version: int,
+              method: str = "linear") -> SolverResult:
+        """Returns the cached result for these ranges, solving and caching
+        them on a miss.
+
+        Args:
+            anchors (array-like): The (K, D) coordinates of the anchors.
+            ranges (array-like): The (K,) measured ranges to each anchor.
+            geometry_version (int): Identifies the anchor coordinates, and
+                must change whenever they do.
+            method (str): The name of a solver in SOLVERS, which must not be
+                one of WARM_STARTED.
+
+        Returns:
+            SolverResult: The estimate.
+        """
+        quantized = np.rint(np.asarray(ranges, dtype=float) / self.resolution)
+        key = (geometry_version, method, quantized.astype(np.int64).tobytes())
+
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = trilaterate(anchors, ranges, method=method)
+        self._results[key] = result
+        if len(self._results) > self.capacity:
+            self._results.popitem(last=False)
+            self.evictions += 1
+
+        return result
+
+
+    def clear(self) -> None:
+        self._results.clear()
+
+
+    def __len__(self) -> int:
+        return len(self._results)
@@ -0,0 +1,287 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Draws the calculated (and optionally ground truth) coordinates
+                of every device, updated live as the rescuer moves.
+Usage:          from user_interface import UserInterface
+============================================================================="""
+
+import time
+
+import numpy as np
+
+from devices import RESCUER, VICTIM, DeviceRegistry
+from instrumentation import DISABLED, timed
+
+
+class UserInterface:
+    """Draws the devices of a registry. Every scatter, label and line is
+    created once up front and then moved in place each frame, so the cost of a
+    frame does not depend on how long the program has been running.
+
+    The plot is a map: 3D coordinates are drawn from above, projected onto
+    their x and y.
+
+    Frames with nothing new to draw are skipped, leaving the previous one on
+    screen. Frames whose timer tick never came, because the event loop was
+    busy for longer than the interval, are counted as dropped.
+
+    With show_performance, the p50 and p99 latency of every stage the
+    profiler has timed, and its counters, are overlaid in the top left.
+    """
+
+    # The time between frames, in milliseconds
+    INTERVAL = 100
+
+
+    def __init__(self, fig, ax, registry: DeviceRegistry,
+                 xlim=(-40, 40), ylim=(-40, 40), show_legend: bool = True,
+                 show_ground_truth: bool = False, show_heatmap: bool = False,
+                 profiler=None, show_performance: bool = None):
+        """
+        Args:
+            fig (Figure): The figure to animate.
+            ax (Axes): The axes to draw on.
+            registry (DeviceRegistry): The devices to draw, one artist each.
+            xlim (Tuple[float, float]): The fixed x limits of the axes.
+            ylim (Tuple[float, float]): The fixed y limits of the axes.
+            show_legend (bool): Whether to label each device in a legend.
+            show_ground_truth (bool): Whether to also mark where each device
+                really is, read straight from the registry.
+            show_heatmap (bool): Whether to shade how likely each point is
+                to be the rescuer, see update_heatmap.
+            profiler (Profiler, optional): Times update_data and animate,
+                and counts dropped frames.
+            show_performance (bool, optional): Whether to overlay the
+                profiler's latencies. Defaults to whether it is enabled.
+        """
+        self.ax = ax
+        self.fig = fig
+        self.registry = registry
+        self.show_ground_truth = show_ground_truth
+        self.show_heatmap = show_heatmap
+        self.profiler = profiler or DISABLED
+        self.show_performance = self.profiler.enabled if show_performance is None \
+            else show_performance
+        self.points_to_draw = {}
+        self.modes_to_draw = {}
+        self.heatmap_to_draw = None
+        self._has_new_data = False
+        self._background = None
+        self.dropped_frames = 0
+        self._last_frame = None
+
+        # TODO: Set axis limits (could dynamically calculate from points if needed)
+        self.ax.set_xlim(*xlim)
+        self.ax.set_ylim(*ylim)
+        self.ax.grid(True)
+
+        self._create_artists()
+        if show_legend:
+            self.ax.legend(loc="upper right")
+
+        # A full redraw (e.g. after a resize) leaves out the animated artists,
+        # so the new background is saved and they are drawn back onto it.
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+
+    def _create_artists(self) -> None:
+        """Creates every artist the animation will ever draw, with no data."""
+        empty = np.empty((0, 2))
+        self.scatters, self.texts, self.lines = {}, {}, {}
+        self.gt_scatters, self.gt_texts = {}, {}
+        rescuers = [self.registry.names[device_id]
+                    for device_id in self.registry.ids(RESCUER)]
+
+        for device in self.registry:
+            label = device.name
+            self.scatters[label] = self.ax.scatter(empty[:, 0], empty[:, 1], label=label)
+            self.texts[label] = self.ax.text(0, 0, label, fontsize=9, visible=False)
+
+            # Lines between victim/beacon and each rescuer point, keyed by
+            # both names
+            if device.role != RESCUER:
+                color = 'red' if device.role == VICTIM else 'gray'
+                for rescuer in rescuers:
+                    self.lines[label, rescuer] = self.ax.plot(
+                        [], [], color=color, linestyle='--')[0]
+
+            if self.show_ground_truth:
+                marker = 'o' if device.role == RESCUER else 'x'
+                self.gt_scatters[label] = self.ax.scatter(
+                    empty[:, 0], empty[:, 1], color='black', marker=marker)
+                self.gt_texts[label] = self.ax.text(
+                    0, 0, f"{label}GT", fontsize=8, color='black', visible=False)
+
+        # The posterior modes of a particle filter, sized by their weight
+        self.mode_scatter = self.ax.scatter(empty[:, 0], empty[:, 1], color='purple',
+                                            marker='+')
+
+        # Drawn first and lowest, so every marker stays visible on top of it
+        artists = []
+        if self.show_heatmap:
+            xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+            self.heatmap = self.ax.imshow(np.zeros((2, 2)), extent=(*xlim, *ylim),
+                                          origin="lower", aspect="auto", cmap="Blues",
+                                          vmin=0, vmax=1, alpha=0.6, zorder=0,
+                                          visible=False)
+            artists.append(self.heatmap)
+
+        self.artists = [*artists, *self.scatters.values(), *self.texts.values(),
+                        *self.lines.values(), *self.gt_scatters.values(),
+                        *self.gt_texts.values(), self.mode_scatter]
+
+        if self.show_performance:
+            self.performance_text = self.ax.text(
+                0.01, 0.99, "", transform=self.ax.transAxes, ha="left", va="top",
+                fontsize=7, family="monospace", zorder=5,
+                bbox=dict(facecolor="white", alpha=0.7, edgecolor="none"))
+            self.artists.append(self.performance_text)
+
+        # Left out of full redraws, and only ever blitted over the background
+        for artist in self.artists:
+            artist.set_animated(True)
+
+
+    @timed("update_data")
+    def update_data(self, points_dict):
+        # If I do not make a copy, UserInterface will access the same self.points
+        # data structure managed in BaseStation, which isn't bad in this
+        # configuration but renders this function useless after its first call
+        # and poses challenges down the road.
+        self.points_to_draw = points_dict.copy()
+        self._has_new_data = True
+
+
+    def update_modes(self, modes: dict) -> None:
+        """Replaces the posterior modes to draw.
+
+        Args:
+            modes (dict): Maps a device name to the (M, 2) positions and (M,)
+                weights of its modes, as returned by ParticleFilter.modes.
+        """
+        self.modes_to_draw = modes.copy()
+        self._has_new_data = True
+
+
+    def update_heatmap(self, likelihood: np.ndarray) -> None:
+        """Replaces the likelihood image to draw, as computed by
+        LikelihoodField over the limits of the axes."""
+        self.heatmap_to_draw = likelihood
+        self._has_new_data = True
+
+
+    def _on_draw(self, event) -> None:
+        canvas = self.fig.canvas
+        self._background = canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_artists()
+
+
+    def _draw_artists(self) -> None:
+        for artist in self.artists:
+            self.fig.draw_artist(artist)
+
+
+    @staticmethod
+    def _place(scatter, text, x, y) -> None:
+        if x is None or y is None:
+            scatter.set_offsets(np.empty((0, 2)))
+            text.set_visible(False)
+        else:
+            scatter.set_offsets([[x, y]])
+            text.set_position((x + 0.1, y + 0.1))
+            text.set_visible(True)
+
+
+    def _count_dropped_frames(self) -> None:
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            dropped = int((now - self._last_frame) * 1000 / self.INTERVAL - 0.5)
+            if dropped > 0:
+                self.dropped_frames += dropped
+                self.profiler.count("dropped_frames", dropped)
+        self._last_frame = now
+
+
+    def animate(self, frame=None):
+        """Animation function called at each frame. Moves the existing
+        artists and returns all of them for blitting, or none when there is
+        no new data, so that the previous frame stays on screen.
+
+        Args:
+            frame (int, optional): The frame number, unused.
+
+        Returns:
+            list: The artists to blit.
+        """
+        self._count_dropped_frames()
+        if not self._has_new_data:
+            return []
+
+        self._has_new_data = False
+        self._move_artists()
+        return self.artists
+
+
+    @timed("animate")
+    def _move_artists(self) -> None:
+        points = self.points_to_draw
+
+        # place points on graph
+        for label, scatter in self.scatters.items():
+            x, y = points.get(label, (None, None))[:2]
+            self._place(scatter, self.texts[label], x, y)
+
+        # place lines between victim/beacon and rescuer point
+        for (label, rescuer), line in self.lines.items():
+            x, y = points.get(label, (None, None))[:2]
+            rx, ry = points.get(rescuer, (None, None))[:2]
+            if None in (x, y, rx, ry):
+                line.set_data([], [])
+            else:
+                line.set_data([x, rx], [y, ry])
+
+        if self.show_heatmap and self.heatmap_to_draw is not None:
+            self.heatmap.set_data(self.heatmap_to_draw)
+            self.heatmap.set_visible(True)
+
+        if self.modes_to_draw:
+            positions, weights = map(np.concatenate, zip(*self.modes_to_draw.values()))
+            self.mode_scatter.set_offsets(positions[:, :2])
+            self.mode_scatter.set_sizes(20 + 200 * weights)
+        else:
+            self.mode_scatter.set_offsets(np.empty((0, 2)))
+
+        for device in self.registry:
+            if device.name in self.gt_scatters:
+                gt_x, gt_y = device.get_gt_coordinates()[:2]
+                self._place(self.gt_scatters[device.name],
+                            self.gt_texts[device.name], gt_x, gt_y)
+
+        if self.show_performance:
+            self.performance_text.set_text(self.profiler.report())
+
+
+    def _on_timer(self) -> None:
+        # Nothing can be blitted until the first full draw saves a background
+        if self._background is None:
+            return
+
+        artists = self.animate()
+        if not artists:
+            return
+
+        canvas = self.fig.canvas
+        canvas.restore_region(self._background)
+        self._draw_artists()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+
+    def start_animation(self):
+        # A plain timer and blitting by hand, rather than FuncAnimation, which
+        # redraws the whole figure whenever a frame returns no artists.
+        self.timer = self.fig.canvas.new_timer(interval=self.INTERVAL)
+        self.timer.add_callback(self._on_timer)
+        self.timer.start()
@@ -0,0 +1,114 @@
+"""=============================================================================
+Authors:        Alex Alves, Bradley Bravender, Noah Johnson
+Organization:   SnowScape
+Date Created:   October 18, 2026
+Purpose:        Runs the solver on a background thread, so a slow solver never
+                blocks the matplotlib event loop.
+Usage:          from worker import SolverWorker
+============================================================================="""
+
+import threading
+import traceback
+from typing import Any, Callable
+
+
+class LatestValueSlot():
+    """A queue which holds at most one value. Putting a value overwrites any
+    value which has not been taken yet, so a consumer which falls behind only
+    ever sees the newest value instead of working through a backlog.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._value = None
+        self._has_value = False
+        self._closed = False
+        self.overwritten = 0
+
+
+    def put(self, value: Any) -> None:
+        """Stores a value, replacing any pending one.
+
+        Args:
+            value (Any): The value to hand to the consumer.
+        """
+        with self._condition:
+            if self._has_value:
+                self.overwritten += 1
+            self._value = value
+            self._has_value = True
+            self._condition.notify()
+
+
+    def get(self) -> Any:
+        """Waits for and takes the pending value.
+
+        Raises:
+            EOFError: If the slot was closed while waiting.
+
+        Returns:
+            Any: The newest value put into the slot.
+        """
+        with self._condition:
+            while not self._has_value and not self._closed:
+                self._condition.wait()
+            if not self._has_value:
+                raise EOFError("The slot was closed.")
+
+            value, self._value, self._has_value = self._value, None, False
+            return value
+
+
+    def close(self) -> None:
+        """Wakes up any waiting consumer and stops it from waiting again."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class SolverWorker(threading.Thread):
+    """Solves submitted inputs one at a time on a daemon thread, always taking
+    the newest input, and hands each result to a publish callback.
+
+    The publish callback runs on the worker thread. It should only swap in a
+    reference to the result, as UserInterface.update_data does, and leave the
+    drawing to the GUI thread.
+    """
+
+    def __init__(self, solve: Callable[[Any], Any], publish: Callable[[Any], None]):
+        """
+        Args:
+            solve (Callable): Computes a result from a submitted input.
+            publish (Callable): Receives every result.
+        """
+        super().__init__(name="solver-worker", daemon=True)
+        self.solve = solve
+        self.publish = publish
+        self.slot = LatestValueSlot()
+        self.solved = 0
+
+
+    def submit(self, value: Any) -> None:
+        """Queues an input to solve, dropping any input still waiting."""
+        self.slot.put(value)
+
+
+    def run(self) -> None:
+        while True:
+            try:
+                value = self.slot.get()
+            except EOFError:
+                return
+
+            try:
+                self.publish(self.solve(value))
+                self.solved += 1
+            except Exception:
+                # A bad input must not kill the worker for the rest of the run.
+                traceback.print_exc()
+
+
+    def stop(self, timeout: float = None) -> None:
+        """Stops the worker once its current solve finishes."""
+        self.slot.close()
+        self.join(timeout)